@@ -0,0 +1,267 @@
+"""
+Headless scoring API for dealer integrations.
+
+Runs next to the Streamlit UI and shares its scoring and persistence rules
+without importing Streamlit:
+
+    uvicorn api:app --host 0.0.0.0 --port 8000 --workers 4
+
+Endpoints
+    GET  /health            liveness probe
+    POST /score             score one applicant
+    POST /score/batch       score {"applicants": [...]} in one vectorized pass
+    POST /applicants        score and save one applicant (same columns as the form)
+    GET  /metrics           Prometheus text format latency/row/error metrics
+"""
+import contextlib
+import dataclasses
+import functools
+import os
+
+import pandas as pd
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse
+from starlette.routing import Route
+
+from db import (
+    CNIC_EXISTS_SQL, DUPLICATE_CNIC_MESSAGE, applicant_values, backend, get_pool, insert_query, save_to_db,
+    score_fields, summary_deltas, summary_upsert_query, unique_cnic_enforced,
+)
+import scoring
+from metrics import render_prometheus, timed
+from scoring import (
+    BATCH_REQUIRED_COLUMNS, normalize_cnic, score_applicant, score_batch,
+    validate_cnic, validate_phone,
+)
+
+API_DB_POOL_MIN = int(os.environ.get("API_DB_POOL_MIN", "2"))
+API_DB_POOL_MAX = int(os.environ.get("API_DB_POOL_MAX", "20"))
+API_BATCH_LIMIT = int(os.environ.get("API_BATCH_LIMIT", "100000"))
+
+NUMERIC_FIELDS = [
+    "net_salary", "applicant_bank_balance", "guarantor_bank_balance", "emi", "tenure",
+    "outstanding", "salary_consistency", "job_years", "age", "dependents",
+]
+# Text fields and their allowed values; the scorecard-backed sets are read per
+# request so reload_scorecard() applies. bike_type is free text: types without
+# their own income brackets use the default ones.
+CHOICE_FIELDS = {
+    "gender": lambda: ("M", "F"),
+    "employer_type": lambda: scoring.SCORECARD.employer_points,
+    "residence": lambda: scoring.SCORECARD.residence_points,
+    "applicant_type": lambda: ("Employee", "Businessman"),
+    "tax_return": lambda: ("Yes", "No"),
+}
+TEXT_FIELDS = [*CHOICE_FIELDS, "bike_type"]
+# Form fields save_to_db needs on top of the scoring inputs
+PERSIST_REQUIRED_FIELDS = [
+    "first_name", "last_name", "cnic", "license_no", "phone_number",
+    "guarantors", "electricity_bill", "pdc_option",
+    "street_address", "area_address", "city", "state_province", "country",
+    "bike_price", "down_payment",
+]
+
+
+class InvalidPayload(ValueError):
+    pass
+
+
+def _scoring_inputs(payload: dict) -> dict:
+    """ Validate one applicant payload and return score_applicant's keyword arguments """
+    if not isinstance(payload, dict):
+        raise InvalidPayload("Applicant must be a JSON object")
+    missing = [f for f in BATCH_REQUIRED_COLUMNS if payload.get(f) is None]
+    if missing:
+        raise InvalidPayload(f"Missing fields: {', '.join(missing)}")
+
+    inputs = {
+        "net_salary": payload["net_salary"],
+        "gender": payload["gender"],
+        "bike_type": payload.get("bike_type"),
+        "applicant_bank_balance": payload["applicant_bank_balance"],
+        "guarantor_bank_balance": payload.get("guarantor_bank_balance"),
+        "emi": payload["emi"],
+        "tenure": payload["tenure"],
+        "outstanding": payload.get("outstanding", 0),
+        "salary_consistency": payload["salary_consistency"],
+        "employer_type": payload["employer_type"],
+        "job_years": payload["job_years"],
+        "age": payload["age"],
+        "dependents": payload["dependents"],
+        "residence": payload["residence"],
+        "applicant_type": payload.get("applicant_type", "Employee"),
+        "tax_return": payload.get("tax_return", "Yes"),
+    }
+    for field in NUMERIC_FIELDS:
+        value = inputs[field]
+        if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float))):
+            raise InvalidPayload(f"{field} must be a number")
+    for field in TEXT_FIELDS:
+        value = inputs[field]
+        if value is not None and not isinstance(value, str):
+            raise InvalidPayload(f"{field} must be a string")
+    for field, allowed in CHOICE_FIELDS.items():
+        if inputs[field] not in allowed():
+            raise InvalidPayload(f"{field} must be one of: {', '.join(allowed())}")
+    return inputs
+
+
+def _score_one(payload: dict) -> dict:
+    return dataclasses.asdict(score_applicant(**_scoring_inputs(payload)))
+
+
+def _timed_endpoint(op: str):
+    """ Record each request's latency (and failures) under `op` """
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def wrapper(request: Request):
+            with timed(op):
+                return await handler(request)
+        return wrapper
+    return decorate
+
+
+async def _json_body(request: Request):
+    try:
+        return await request.json()
+    except ValueError:
+        raise InvalidPayload("Body must be valid JSON")
+
+
+# -----------------------------
+# Endpoints
+# -----------------------------
+async def health(request: Request):
+    return JSONResponse({"status": "ok"})
+
+
+@_timed_endpoint("api.score")
+async def score(request: Request):
+    payload = await _json_body(request)
+    return JSONResponse(_score_one(payload))
+
+
+@_timed_endpoint("api.score_batch")
+async def score_many(request: Request):
+    payload = await _json_body(request)
+    applicants = payload.get("applicants") if isinstance(payload, dict) else None
+    if not isinstance(applicants, list) or not applicants:
+        raise InvalidPayload('Body must be {"applicants": [...]} with at least one applicant')
+    if len(applicants) > API_BATCH_LIMIT:
+        raise InvalidPayload(f"At most {API_BATCH_LIMIT:,} applicants per request")
+
+    rows = [_scoring_inputs(a) for a in applicants]
+    results = await run_in_threadpool(score_batch, pd.DataFrame(rows))
+    return JSONResponse({
+        "scorecard_version": scoring.SCORECARD.version,
+        "results": results.to_dict(orient="records"),
+    })
+
+
+@_timed_endpoint("api.persist")
+async def persist(request: Request):
+    payload = await _json_body(request)
+    inputs = _scoring_inputs(payload)
+    missing = [f for f in PERSIST_REQUIRED_FIELDS if payload.get(f) is None]
+    if missing:
+        raise InvalidPayload(f"Missing fields: {', '.join(missing)}")
+    if not validate_cnic(payload["cnic"]):
+        raise InvalidPayload("Invalid CNIC format. Use XXXXX-XXXXXXX-X")
+    if not validate_phone(payload["phone_number"]):
+        raise InvalidPayload("Invalid phone number. Use exactly 11 digits")
+
+    # The decision is always computed here, never taken from the caller
+    result = score_applicant(**inputs)
+    data = {
+        "female_guarantor": None, "postal_code": None,
+        **payload, **inputs,
+        "cnic": normalize_cnic(payload["cnic"]),
+        **score_fields(result),
+    }
+
+    pool = request.app.state.db_pool
+    if pool is None:
+        # Postgres / SQLite: reuse the synchronous pool off the event loop
+        try:
+            applicant_id = await run_in_threadpool(save_to_db, data)
+        except ValueError as e:
+            return JSONResponse({"error": str(e)}, status_code=409)
+        return JSONResponse({"id": applicant_id, **dataclasses.asdict(result)}, status_code=201)
+
+    async with pool.acquire() as conn:
+        async with conn.cursor() as cursor:
+            # Same rule as save_to_db: pre-check only until uq_data_live_cnic exists
+            if not unique_cnic_enforced():
+                await cursor.execute(CNIC_EXISTS_SQL, (data["cnic"],))
+                (exists,) = await cursor.fetchone()
+                if exists:
+                    await conn.rollback()
+                    return JSONResponse({"error": DUPLICATE_CNIC_MESSAGE}, status_code=409)
+            try:
+                await cursor.execute(insert_query(), applicant_values(data))
+            except Exception as e:
+                await conn.rollback()
+                if backend().is_duplicate_key(e):
+                    return JSONResponse({"error": DUPLICATE_CNIC_MESSAGE}, status_code=409)
+                raise
+            applicant_id = cursor.lastrowid
+            await cursor.executemany(summary_upsert_query(), summary_deltas([data]))
+        await conn.commit()
+
+    return JSONResponse({"id": applicant_id, **dataclasses.asdict(result)}, status_code=201)
+
+
+async def metrics(request: Request):
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def invalid_payload(request: Request, exc: InvalidPayload):
+    return JSONResponse({"error": str(exc)}, status_code=422)
+
+
+# -----------------------------
+# App
+# -----------------------------
+@contextlib.asynccontextmanager
+async def lifespan(app: Starlette):
+    storage = backend()
+    if storage.name != "mysql":
+        app.state.db_pool = None
+        yield
+        return
+
+    import aiomysql
+
+    # The async pool bypasses db's pool, so apply the schema migrations here
+    await run_in_threadpool(get_pool)
+    app.state.db_pool = await aiomysql.create_pool(
+        host=storage.config["host"],
+        port=storage.config["port"],
+        user=storage.config["user"],
+        password=storage.config["password"],
+        db=storage.config["database"],
+        minsize=API_DB_POOL_MIN,
+        maxsize=API_DB_POOL_MAX,
+        pool_recycle=3600,
+        autocommit=False,
+    )
+    try:
+        yield
+    finally:
+        app.state.db_pool.close()
+        await app.state.db_pool.wait_closed()
+
+
+app = Starlette(
+    routes=[
+        Route("/health", health, methods=["GET"]),
+        Route("/score", score, methods=["POST"]),
+        Route("/score/batch", score_many, methods=["POST"]),
+        Route("/applicants", persist, methods=["POST"]),
+        Route("/metrics", metrics, methods=["GET"]),
+    ],
+    exception_handlers={InvalidPayload: invalid_payload},
+    lifespan=lifespan,
+)
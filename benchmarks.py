@@ -0,0 +1,473 @@
+"""
+Benchmarks for scoring, the database read/write paths and exports.
+
+    python benchmarks.py startup            # exits 1 when over the startup/rerun budget
+    python benchmarks.py scoring [--sizes 1 10000 1000000]
+    python benchmarks.py cashflow [--loan-sizes 1000 10000 50000]
+    python benchmarks.py whatif [--grid-sizes 10000 1000000 4000000]
+    python benchmarks.py db [--table-sizes 1000 10000 100000] [--database-url URL]
+    python benchmarks.py all --json results/$(git rev-parse --short HEAD).json
+    python benchmarks.py compare results/old.json results/new.json
+
+DB benchmarks run against a throwaway SQLite file by default. Pass
+--database-url to use a local MySQL or Postgres scratch database instead;
+its `data` table is dropped and re-created, so never point this at the
+production database.
+
+--json writes every measurement plus the git commit, Python version and
+platform, so runs from different commits can be diffed with `compare`.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+import cashflow
+import db
+import export
+import rescore
+import scoring
+import sensitivity
+import storage
+
+
+# -----------------------------
+# Measurement
+# -----------------------------
+RESULTS = []
+
+
+def measure(group: str, name: str, size: int, fn, repeat: int = 5, setup=None):
+    """ Time `fn()` `repeat` times (after optional `setup()`) and record the result """
+    timings = []
+    for _ in range(repeat):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+
+    median = statistics.median(timings)
+    result = {
+        "group": group,
+        "name": name,
+        "size": size,
+        "repeat": repeat,
+        "median_ms": median * 1000,
+        "mean_ms": statistics.fmean(timings) * 1000,
+        "min_ms": min(timings) * 1000,
+        "max_ms": max(timings) * 1000,
+        "per_item_us": median * 1e6 / max(size, 1),
+    }
+    RESULTS.append(result)
+    print(f"  {name:<34} n={size:<9,} median {result['median_ms']:>10.3f} ms   "
+          f"{result['per_item_us']:>9.3f} µs/item")
+    return result
+
+
+def _repeat_for(size: int) -> int:
+    return 5 if size <= 10_000 else 1
+
+
+# -----------------------------
+# Synthetic Applicants
+# -----------------------------
+def synthetic_applicants(n: int, seed: int = 42, start: int = 0) -> pd.DataFrame:
+    """ Realistic-looking applicants covering every bracket; CNICs are unique per `start` offset """
+    rng = np.random.default_rng(seed + start)
+    plans = np.array([(30000, 10000, 24), (60000, 25500, 12), (40000, 14900, 24), (40000, 9900, 36)])
+    plan = plans[rng.integers(0, len(plans), n)]
+    bike_type = np.where(plan[:, 1] == 10000, "EV-1", "EV-125")
+    ids = np.arange(start, start + n)
+    cnic_digits = pd.Series(ids + 1_000_000_000_000).astype(str)
+
+    return pd.DataFrame({
+        "applicant_type": rng.choice(["Employee", "Businessman"], n, p=[0.8, 0.2]),
+        "first_name": "Applicant",
+        "last_name": pd.Series(ids).astype(str),
+        "cnic": cnic_digits.str[:5] + "-" + cnic_digits.str[5:12] + "-" + cnic_digits.str[12],
+        "phone_number": "0300" + pd.Series(ids % 10_000_000).astype(str).str.zfill(7),
+        "gender": rng.choice(["M", "F"], n, p=[0.7, 0.3]),
+        "guarantors": "Yes",
+        "female_guarantor": "Yes",
+        "electricity_bill": "Yes",
+        "pdc_option": "Yes",
+        "street_address": "House " + pd.Series(ids % 500).astype(str),
+        "area_address": "Block " + pd.Series(ids % 20).astype(str),
+        "city": rng.choice(["Lahore", "Karachi", "Islamabad", "Faisalabad", "Multan"], n),
+        "state_province": "Punjab",
+        "postal_code": "54000",
+        "country": "Pakistan",
+        "net_salary": rng.integers(20_000, 250_000, n),
+        "applicant_bank_balance": rng.integers(0, 200_000, n),
+        "guarantor_bank_balance": np.where(rng.random(n) < 0.5, rng.integers(0, 300_000, n), np.nan),
+        "employer_type": rng.choice(list(scoring.SCORECARD.employer_points), n),
+        "age": rng.integers(16, 65, n),
+        "residence": rng.choice(list(scoring.SCORECARD.residence_points), n),
+        "bike_type": bike_type,
+        "bike_price": plan[:, 0] + plan[:, 1] * plan[:, 2],
+        "down_payment": plan[:, 0],
+        "tenure": plan[:, 2],
+        "emi": plan[:, 1],
+        "outstanding": rng.integers(0, 400_000, n),
+        "salary_consistency": rng.integers(0, 7, n),
+        "job_years": rng.integers(0, 20, n),
+        "dependents": rng.integers(0, 7, n),
+        "tax_return": rng.choice(["Yes", "No"], n, p=[0.9, 0.1]),
+        "decision": "Review",
+    })
+
+
+# -----------------------------
+# Scoring Benchmarks
+# -----------------------------
+def bench_scoring(sizes):
+    print("Scoring")
+    for size in sizes:
+        df = synthetic_applicants(size)
+        cols = {c: df[c].tolist() for c in df.columns}
+        guarantor = [None if pd.isna(v) else v for v in cols["guarantor_bank_balance"]]
+        repeat = _repeat_for(size)
+
+        scalar = {
+            "income_score": lambda: [scoring.income_score(s, g, b) for s, g, b in
+                                     zip(cols["net_salary"], cols["gender"], cols["bike_type"])],
+            "bank_balance_score_custom": lambda: [scoring.bank_balance_score_custom(a, g, e) for a, g, e in
+                                                  zip(cols["applicant_bank_balance"], guarantor, cols["emi"])],
+            "salary_consistency_score": lambda: [scoring.salary_consistency_score(m) for m in cols["salary_consistency"]],
+            "employer_type_score": lambda: [scoring.employer_type_score(e) for e in cols["employer_type"]],
+            "job_tenure_score": lambda: [scoring.job_tenure_score(y) for y in cols["job_years"]],
+            "age_score": lambda: [scoring.age_score(a) for a in cols["age"]],
+            "dependents_score": lambda: [scoring.dependents_score(d) for d in cols["dependents"]],
+            "residence_score": lambda: [scoring.residence_score(r) for r in cols["residence"]],
+            "dti_score": lambda: [scoring.dti_score(o, e, s, t) for o, e, s, t in
+                                  zip(cols["outstanding"], cols["emi"], cols["net_salary"], cols["tenure"])],
+        }
+        for name, fn in scalar.items():
+            measure("scoring", name, size, fn, repeat)
+
+        def score_each():
+            for row in zip(cols["net_salary"], cols["gender"], cols["bike_type"], cols["applicant_bank_balance"],
+                           guarantor, cols["emi"], cols["tenure"], cols["outstanding"], cols["salary_consistency"],
+                           cols["employer_type"], cols["job_years"], cols["age"], cols["dependents"],
+                           cols["residence"], cols["applicant_type"], cols["tax_return"]):
+                scoring.score_applicant(*row)
+
+        measure("scoring", "score_applicant (cold cache)", size, score_each, repeat,
+                setup=scoring.score_applicant.cache_clear)
+        measure("scoring", "score_applicant (warm cache)", size, score_each, repeat)
+        measure("scoring", "score_batch", size, lambda: scoring.score_batch(df), repeat)
+
+
+# -----------------------------
+# Cash-flow Benchmarks
+# -----------------------------
+def synthetic_loans(n: int, seed: int = 42) -> cashflow.Loans:
+    rng = np.random.default_rng(seed)
+    return cashflow.loans_from_arrays(
+        np.arange(1, n + 1),
+        np.datetime64("2024-01") + rng.integers(0, 24, n),
+        rng.integers(20_000, 60_000, n),
+        rng.integers(5_000, 15_000, n),
+        rng.choice([12, 24, 36], n),
+    )
+
+
+def bench_cashflow(sizes):
+    print("Cash flow")
+    for size in sizes:
+        loans = synthetic_loans(size)
+        repeat = _repeat_for(size)
+        measure("cashflow", "collections_by_month", size, lambda: cashflow.collections_by_month(loans), repeat)
+        measure("cashflow", "loan_schedule", size, lambda: cashflow.loan_schedule(loans), repeat)
+        measure("cashflow", "export_schedule_csv", size, lambda: cashflow.export_schedule_csv(loans), repeat)
+
+
+# -----------------------------
+# What-if Benchmarks
+# -----------------------------
+def bench_whatif(sizes):
+    print("What-if sweep")
+    plans = [(bike, name) for bike, names in scoring.FINANCING_PLANS.items() for name in names]
+    for size in sizes:
+        # 4 plans x 2 genders x 2 residences x 250 balances, salaries fill the rest
+        salary_steps = max(1, size // (len(plans) * 2 * 2 * 250))
+        sweep_args = dict(
+            salaries=np.linspace(20_000, 250_000, salary_steps),
+            balances=np.linspace(0, 300_000, 250),
+            plans=plans,
+            genders=["M", "F"],
+            residences=["Owned", "Rented"],
+        )
+        points = salary_steps * len(plans) * 2 * 2 * 250
+        sweep = sensitivity.sensitivity_sweep(**sweep_args)
+        selection = {"plan": plans[0], "gender": "F", "residence": "Owned"}
+        measure("whatif", "sensitivity_sweep", points, lambda: sensitivity.sensitivity_sweep(**sweep_args),
+                _repeat_for(points))
+        measure("whatif", "decision_frame", points, lambda: sweep.decision_frame(**selection), 5)
+
+
+# -----------------------------
+# Database Targets
+# -----------------------------
+def _install(storage_backend):
+    """ Point db.py at `storage_backend` with an empty `data` table and every schema migration applied """
+    # pd.read_sql warns about non-SQLAlchemy DBAPI connections; they work fine here
+    warnings.filterwarnings("ignore", message="pandas only supports SQLAlchemy")
+    db.use_backend(storage_backend)
+    with db.db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DROP TABLE IF EXISTS data")
+        cursor.execute("DROP TABLE IF EXISTS data_summary")
+        conn.commit()
+        cursor.close()
+    db.ensure_schema(db.get_pool())
+
+
+def _scratch_backend(url: str):
+    """ Backend for --database-url, refusing anything that looks like production """
+    target = storage.backend_from_url(url)
+    production = db.backend()
+    if isinstance(target, storage.MySQLBackend) and isinstance(production, storage.MySQLBackend):
+        if (target.config["host"] == production.config["host"]
+                or target.config["database"] == production.config["database"]):
+            sys.exit("Refusing to benchmark against the production database; use a local scratch database.")
+    elif url == db.DATABASE_URL:
+        sys.exit("Refusing to benchmark against the production database; use a local scratch database.")
+    return target
+
+
+def _seed(df: pd.DataFrame):
+    """ Load synthetic rows directly (seeding is setup, not part of any measurement) """
+    rows = [
+        db.applicant_values({**rec, "license_no": f"{rec['cnic']}#001"})
+        for rec in df.to_dict("records")
+    ]
+    rows = [tuple(db._db_value(v) for v in row) for row in rows]
+    with db.db_connection() as conn:
+        cursor = conn.cursor()
+        for start in range(0, len(rows), db.BULK_CHUNK_SIZE):
+            cursor.executemany(db.insert_query(), rows[start:start + db.BULK_CHUNK_SIZE])
+        conn.commit()
+        cursor.close()
+    db.rebuild_summary()
+
+
+# -----------------------------
+# Database Benchmarks
+# -----------------------------
+DB_WRITE_OPS = 100
+
+
+def bench_db(table_sizes, args):
+    target = _scratch_backend(args.database_url) if args.database_url else None
+    print(f"Database ({target.name if target else 'throwaway SQLite file'})")
+    tmpdir = tempfile.mkdtemp(prefix="ev_bench_")
+
+    for size in table_sizes:
+        _install(target or storage.SQLiteBackend(os.path.join(tmpdir, f"bench_{size}.db")))
+        _seed(synthetic_applicants(size))
+        print(f" table size {size:,}")
+
+        # --- Writes: one applicant per call, like the Save button ---
+        extra = synthetic_applicants(DB_WRITE_OPS, start=10_000_000 + size).to_dict("records")
+        records = iter(extra)
+
+        def save_batch():
+            for rec in records:
+                db.save_to_db({**rec, "license_no": f"{rec['cnic']}#001"})
+
+        measure("db", "save_to_db (per call)", DB_WRITE_OPS, save_batch, repeat=1)
+
+        import_df = synthetic_applicants(min(size, 5000), start=20_000_000 + size)
+        measure("db", "bulk_import_applicants", len(import_df),
+                lambda: db.bulk_import_applicants(import_df.astype(str)), repeat=1)
+
+        # --- Reads, with the shared cache emptied before every run ---
+        measure("db", "fetch_all_applicants", size, db.fetch_all_applicants,
+                _repeat_for(size), setup=db.invalidate_cache)
+        measure("db", "count_applicants", size, db.count_applicants,
+                5, setup=db.invalidate_cache)
+        measure("db", "fetch_applicants_page (first)", size, db.fetch_applicants_page,
+                5, setup=db.invalidate_cache)
+        measure("db", "fetch_applicants_page (middle)", size,
+                lambda: db.fetch_applicants_page(after_id=size // 2),
+                5, setup=db.invalidate_cache)
+        measure("db", "fetch_applicants_page (filtered)", size,
+                lambda: db.fetch_applicants_page({"city": "Lahore", "decision": ["Review"]}),
+                5, setup=db.invalidate_cache)
+        measure("db", "fetch_all_applicants (cached)", size, db.fetch_all_applicants, 5)
+        measure("db", "portfolio_aggregates (summary)", size,
+                lambda: db.portfolio_aggregates("city"),
+                5, setup=db.invalidate_cache)
+        measure("db", "portfolio_aggregates (date range)", size,
+                lambda: db.portfolio_aggregates("city", {"date_from": datetime.now().date()}),
+                5, setup=db.invalidate_cache)
+
+        # --- Rescoring: back-test every (stale) row, then write the scores once ---
+        measure("db", "rescore (back-test)", size, rescore.rescore, _repeat_for(size))
+        measure("db", "rescore (apply)", size, lambda: rescore.rescore(apply=True), repeat=1)
+
+        # --- Deletes of the rows saved above ---
+        with db.db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT id FROM data ORDER BY id DESC LIMIT %s", (DB_WRITE_OPS,))
+            delete_ids = [row[0] for row in cursor.fetchall()]
+            cursor.close()
+        measure("db", "delete_applicant (per call)", len(delete_ids),
+                lambda: [db.delete_applicant(i) for i in delete_ids], repeat=1)
+        measure("db", "purge_deleted", len(delete_ids), lambda: db.purge_deleted(older_than=-60), repeat=1)
+
+        # --- Exports ---
+        for label, (writer, _, _) in export.EXPORT_FORMATS.items():
+            measure("export", f"export {label}", size, writer, 1 if size > 10_000 else 3)
+
+
+# -----------------------------
+# Startup & Rerun Budget
+# -----------------------------
+APP_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_instalment_portal.py")
+APP_MODULES = "streamlit, cashflow, db, export, journal, metrics, scoring, sensitivity, styles"
+# Modules the landing page and the form tabs must not import (see the lazy imports in db/export/scoring)
+HEAVY_MODULES = ("pandas", "mysql.connector", "pyarrow", "xlsxwriter")
+
+STARTUP_BUDGET_MS = float(os.environ.get("STARTUP_BUDGET_MS", "500"))   # cold import of the app's modules
+RERUN_BUDGET_MS = float(os.environ.get("RERUN_BUDGET_MS", "150"))       # one full rerun of the main page
+
+
+def _cold_import_ms() -> tuple[float, list]:
+    """ Import the app's modules in a fresh interpreter; returns (ms, heavy modules that got loaded) """
+    code = (
+        "import json, sys, time; t = time.perf_counter(); "
+        f"import {APP_MODULES}; "
+        "print(json.dumps([(time.perf_counter() - t) * 1000, "
+        f"[m for m in {HEAVY_MODULES!r} if m in sys.modules]]))"
+    )
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                         cwd=os.path.dirname(APP_SCRIPT)).stdout
+    elapsed, loaded = json.loads(out.strip().splitlines()[-1])
+    return elapsed, loaded
+
+
+def bench_startup(repeat: int = 5) -> bool:
+    """ Measure cold start and rerun cost against STARTUP_BUDGET_MS / RERUN_BUDGET_MS; True if within budget """
+    from streamlit.testing.v1 import AppTest
+
+    print("Startup & rerun")
+    samples = [_cold_import_ms() for _ in range(repeat)]
+    cold_ms = statistics.median(ms for ms, _ in samples)
+    heavy = sorted({m for _, loaded in samples for m in loaded})
+    RESULTS.append({"group": "startup", "name": "cold import", "size": 1, "repeat": repeat,
+                    "median_ms": cold_ms, "mean_ms": cold_ms, "min_ms": min(ms for ms, _ in samples),
+                    "max_ms": max(ms for ms, _ in samples), "per_item_us": cold_ms * 1000})
+    print(f"  {'cold import':<34} median {cold_ms:>10.3f} ms   heavy modules loaded: {heavy or 'none'}")
+
+    measure("startup", "landing page (first run)", 1,
+            lambda: AppTest.from_file(APP_SCRIPT, default_timeout=30).run(), repeat)
+
+    app = AppTest.from_file(APP_SCRIPT, default_timeout=30)
+    app.session_state["app_started"] = True
+    app.run()
+    rerun = measure("startup", "main page rerun", 1, app.run, repeat * 2)
+
+    ok = cold_ms <= STARTUP_BUDGET_MS and rerun["median_ms"] <= RERUN_BUDGET_MS and not heavy
+    print(f"  budget: cold import {cold_ms:.0f}/{STARTUP_BUDGET_MS:.0f} ms, "
+          f"rerun {rerun['median_ms']:.0f}/{RERUN_BUDGET_MS:.0f} ms -> {'OK' if ok else 'OVER BUDGET'}")
+    return ok
+
+
+# -----------------------------
+# Output & Comparison
+# -----------------------------
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def write_json(path: str):
+    payload = {
+        "commit": _git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": RESULTS,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2)
+    print(f"Wrote {len(RESULTS)} results to {path}")
+
+
+def compare(old_path: str, new_path: str):
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+
+    baseline = {(r["group"], r["name"], r["size"]): r["median_ms"] for r in old["results"]}
+    print(f"{old['commit']} -> {new['commit']}")
+    for r in new["results"]:
+        before = baseline.get((r["group"], r["name"], r["size"]))
+        if before is None:
+            continue
+        change = (r["median_ms"] - before) / before * 100 if before else 0.0
+        print(f"  {r['name']:<34} n={r['size']:<9,} {before:>10.3f} -> {r['median_ms']:>10.3f} ms  ({change:+.1f}%)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EV Bike Finance Portal benchmarks")
+    parser.add_argument("suite", choices=["scoring", "cashflow", "whatif", "db", "startup", "all", "compare"])
+    parser.add_argument("files", nargs="*", help="for compare: OLD.json NEW.json")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10_000, 1_000_000],
+                        help="applicant counts for scoring benchmarks")
+    parser.add_argument("--loan-sizes", type=int, nargs="+", default=[1_000, 10_000, 50_000],
+                        help="approved-loan counts for cash-flow benchmarks")
+    parser.add_argument("--grid-sizes", type=int, nargs="+", default=[10_000, 1_000_000, 4_000_000],
+                        help="grid points for what-if sweep benchmarks")
+    parser.add_argument("--table-sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000],
+                        help="seeded table sizes for DB benchmarks")
+    parser.add_argument("--json", help="write machine-readable results to this file")
+    parser.add_argument("--database-url",
+                        help="scratch database for DB benchmarks (mysql://, postgresql:// or sqlite:///); default: temp SQLite")
+    args = parser.parse_args(argv)
+
+    if args.suite == "compare":
+        if len(args.files) != 2:
+            parser.error("compare needs OLD.json and NEW.json")
+        compare(*args.files)
+        return
+
+    within_budget = True
+    if args.suite in ("startup", "all"):
+        within_budget = bench_startup()
+    if args.suite in ("scoring", "all"):
+        bench_scoring(args.sizes)
+    if args.suite in ("cashflow", "all"):
+        bench_cashflow(args.loan_sizes)
+    if args.suite in ("whatif", "all"):
+        bench_whatif(args.grid_sizes)
+    if args.suite in ("db", "all"):
+        bench_db(args.table_sizes, args)
+    if args.json:
+        write_json(args.json)
+    if not within_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1320 @@
+import functools
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+
+from typing import TYPE_CHECKING
+
+from metrics import instrumented, register_gauges
+from scoring import COMPONENTS, normalize_cnic, validate_cnic, validate_phone
+from storage import CNIC_DIGITS_SQL, StorageBackend, backend_from_url
+
+# pandas and the database drivers are imported where they are used, so importing
+# this module (the landing page, the Agent tab) doesn't pay for either.
+if TYPE_CHECKING:
+    import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+# -----------------------------
+# Database Connection
+# -----------------------------
+DB_CONFIG = {
+    "host": "3.17.21.91",
+    "user": "ahsan",
+    "password": "ahsan@321",
+    "database": "ev_installment_project",
+}
+
+# mysql://, postgresql:// or sqlite:/// (see storage.py); unset means MySQL with DB_CONFIG
+DATABASE_URL = os.environ.get("DATABASE_URL", "")
+_backend = backend_from_url(DATABASE_URL, DB_CONFIG)
+
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))        # seconds to wait for a free connection
+DB_POOL_PING_AFTER = float(os.environ.get("DB_POOL_PING_AFTER", "30"))  # idle seconds before a health check
+
+
+class PooledConnection:
+    """ Thin proxy over a driver connection; close() hands it back to the pool """
+
+    def __init__(self, pool, conn):
+        self._pool = pool
+        self._conn = conn
+
+    def __getattr__(self, name):
+        return getattr(self._conn, name)
+
+    def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            self._pool._release(conn)
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of database connections.
+
+    Streamlit only re-executes the main script on a rerun — imported modules
+    stay loaded — so one pool held by this module is shared by every session
+    and every rerun. At most `size` connections are open; callers wait up to
+    `timeout` seconds for one to free up. Connections idle longer than
+    `ping_after` seconds are health-checked (and reconnected) before reuse.
+    """
+
+    def __init__(self, size=DB_POOL_SIZE, timeout=DB_POOL_TIMEOUT, ping_after=DB_POOL_PING_AFTER,
+                 connect=None, backend: StorageBackend | None = None):
+        self.size = size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self.backend = backend or _backend
+        self._connect = connect or self.backend.connect
+        self._idle = queue.LifoQueue()  # (conn, last_used) — LIFO keeps warm connections in use
+        self._slots = threading.BoundedSemaphore(size)
+        self._lock = threading.Lock()
+        self._wait_ms = deque(maxlen=1000)
+        self._counters = {
+            "checkouts": 0, "timeouts": 0, "in_use": 0,
+            "created": 0, "reconnects": 0, "discarded": 0,
+        }
+
+    def _count(self, name, delta=1):
+        with self._lock:
+            self._counters[name] += delta
+
+    def checkout(self) -> PooledConnection:
+        start = time.perf_counter()
+        if not self._slots.acquire(timeout=self.timeout):
+            self._count("timeouts")
+            raise RuntimeError(
+                f"❌ No database connection available after {self.timeout:.0f}s (pool size {self.size})."
+            )
+        waited_ms = (time.perf_counter() - start) * 1000
+
+        try:
+            conn = self._take_healthy()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._counters["checkouts"] += 1
+            self._counters["in_use"] += 1
+            self._wait_ms.append(waited_ms)
+        return PooledConnection(self, conn)
+
+    def _take_healthy(self):
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+                self._count("created")
+                return conn
+
+            if time.monotonic() - last_used < self.ping_after:
+                return conn
+            try:
+                if self.backend.ensure_alive(conn):
+                    self._count("reconnects")
+                return conn
+            except Exception:
+                self._discard(conn)
+
+    def _release(self, conn):
+        try:
+            if self.backend.in_transaction(conn):
+                conn.rollback()
+            self._idle.put((conn, time.monotonic()))
+        except Exception:
+            self._discard(conn)
+        finally:
+            self._count("in_use", -1)
+            self._slots.release()
+
+    def _discard(self, conn):
+        self._count("discarded")
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def stats(self) -> dict:
+        """ Counters plus checkout wait-time percentiles over the last 1000 checkouts """
+        with self._lock:
+            waits = sorted(self._wait_ms)
+            stats = dict(self._counters)
+        stats["size"] = self.size
+        stats["idle"] = self._idle.qsize()
+        stats["wait_ms_avg"] = sum(waits) / len(waits) if waits else 0.0
+        stats["wait_ms_p95"] = waits[int(len(waits) * 0.95) - 1] if waits else 0.0
+        stats["wait_ms_max"] = waits[-1] if waits else 0.0
+        return stats
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                pool = ConnectionPool(backend=_backend)
+                ensure_schema(pool)
+                _pool = pool
+    return _pool
+
+
+def backend() -> StorageBackend:
+    return _backend
+
+
+def use_backend(new_backend: StorageBackend):
+    """ Switch storage (tests, benchmarks, tools); the next checkout opens a fresh pool on it """
+    global _backend, _pool
+    with _pool_lock:
+        _backend = new_backend
+        _pool = None
+    invalidate_cache()
+
+
+def get_db_connection():
+    """ Check out a pooled connection; call close() to return it """
+    return get_pool().checkout()
+
+
+@contextmanager
+def db_connection():
+    """ Pooled connection that is rolled back on error and always returned """
+    conn = get_db_connection()
+    try:
+        yield conn
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        conn.close()
+
+
+def pool_stats() -> dict:
+    return get_pool().stats()
+
+
+# -----------------------------
+# Shared Read Cache
+# -----------------------------
+DB_CACHE_SIZE = int(os.environ.get("DB_CACHE_SIZE", "256"))   # cached results kept per process
+DB_CACHE_TTL = float(os.environ.get("DB_CACHE_TTL", "60"))     # seconds; guards against writes by other processes
+
+
+class QueryCache:
+    """
+    Process-wide cache of read results shared by every session.
+
+    Entries are keyed on (query name, arguments, generation). Every write
+    path calls invalidate(), which bumps the generation so all earlier
+    results become unreachable. A read that started before a write stores
+    its result under the old generation, so it can never be served stale.
+    Concurrent misses for the same key wait for a single query.
+    """
+
+    def __init__(self, max_entries=DB_CACHE_SIZE, ttl=DB_CACHE_TTL):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.generation = 0
+        self._entries = OrderedDict()  # key -> (stored_at, value)
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "invalidations": 0}
+
+    def _lookup(self, key):
+        entry = self._entries.get(key)
+        if entry is None or time.monotonic() - entry[0] > self.ttl:
+            return None
+        self._entries.move_to_end(key)
+        self._counters["hits"] += 1
+        return entry
+
+    def get_or_load(self, name, args, loader):
+        with self._lock:
+            key = (name, args, self.generation)
+            entry = self._lookup(key)
+            if entry is not None:
+                return entry[1]
+            inflight = self._inflight.setdefault(key, threading.Lock())
+
+        with inflight:
+            with self._lock:
+                entry = self._lookup(key)
+                if entry is not None:
+                    return entry[1]
+                self._counters["misses"] += 1
+
+            try:
+                value = loader()
+                with self._lock:
+                    self._entries[key] = (time.monotonic(), value)
+                    self._entries.move_to_end(key)
+                    while len(self._entries) > self.max_entries:
+                        self._entries.popitem(last=False)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return value
+
+    def invalidate(self):
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+            stats["generation"] = self.generation
+            stats["entries"] = len(self._entries)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
+
+
+_cache = QueryCache()
+
+
+def cached_read(func):
+    """ Serve `func` from the shared cache; DataFrames are copied so callers can't alter the shared one """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        import pandas as pd
+
+        call_args = repr((args, sorted(kwargs.items())))
+        value = _cache.get_or_load(func.__name__, call_args, lambda: func(*args, **kwargs))
+        return value.copy() if isinstance(value, pd.DataFrame) else value
+    return wrapper
+
+
+def invalidate_cache():
+    _cache.invalidate()
+
+
+def cache_stats() -> dict:
+    return _cache.stats()
+
+
+def _db_gauges() -> dict:
+    """ Pool and cache counters for the metrics endpoint; never opens the pool itself """
+    values = {f"db_cache_{k}": v for k, v in cache_stats().items()}
+    if _pool is not None:
+        values.update({f"db_pool_{k}": v for k, v in _pool.stats().items()})
+    return values
+
+
+register_gauges(_db_gauges)
+
+
+# -----------------------------
+# Schema Migrations
+# -----------------------------
+# Portfolio totals per (city, bike_type, applicant_type, decision), kept in
+# step with `data` by every write path so the dashboard reads O(groups) rows.
+# Key values are clipped to 150 characters to fit MySQL's 3072-byte key limit.
+SUMMARY_DIMENSIONS = ["city", "bike_type", "applicant_type", "decision"]
+SUMMARY_COUNTERS = ["applicants", "scored", "score_sum", "exposure_sum", "emi_sum"]
+SUMMARY_KEY_LENGTH = 150
+
+SUMMARY_TABLE_SQL = f"""CREATE TABLE data_summary (
+    {", ".join(f"{d} VARCHAR({SUMMARY_KEY_LENGTH}) NOT NULL DEFAULT ''" for d in SUMMARY_DIMENSIONS)},
+    applicants INT NOT NULL DEFAULT 0,
+    scored INT NOT NULL DEFAULT 0,
+    score_sum DECIMAL(16,2) NOT NULL DEFAULT 0,
+    exposure_sum DECIMAL(18,2) NOT NULL DEFAULT 0,
+    emi_sum DECIMAL(18,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY ({", ".join(SUMMARY_DIMENSIONS)})
+)"""
+
+SUMMARY_BACKFILL_SQL = f"""
+    INSERT INTO data_summary ({", ".join(SUMMARY_DIMENSIONS + SUMMARY_COUNTERS)})
+    SELECT {", ".join(f"SUBSTR(COALESCE({d}, ''), 1, {SUMMARY_KEY_LENGTH})" for d in SUMMARY_DIMENSIONS)},
+           COUNT(*), COUNT(final_score), COALESCE(SUM(final_score), 0),
+           COALESCE(SUM(bike_price - down_payment), 0), COALESCE(SUM(emi), 0)
+    FROM data
+    WHERE deleted_at IS NULL
+    GROUP BY 1, 2, 3, 4
+"""
+
+# Scoring inputs the `data` table did not keep, the component scores and the
+# scorecard version, so stored applicants can be rescored (see rescore.py).
+# NULL on rows saved before they were stored.
+SCORING_INPUT_COLUMNS = ["salary_consistency", "job_years", "dependents", "tax_return"]
+COMPONENT_SCORE_COLUMNS = [f"{c}_score" for c in COMPONENTS]
+SCORING_COLUMN_TYPES = {
+    "salary_consistency": "INT",
+    "job_years": "INT",
+    "dependents": "INT",
+    "tax_return": "VARCHAR(255)",
+    **{col: "DECIMAL(6,2)" for col in COMPONENT_SCORE_COLUMNS},
+    "dti_ratio": "DECIMAL(10,4)",
+    "reject_reason": "VARCHAR(255)",
+    "scorecard_version": "VARCHAR(64)",
+}
+
+# Idempotent additions to the `data` table, applied once per process when the
+# pool is first created (after CREATE TABLE IF NOT EXISTS). Each entry is
+# (kind, name, DDL); the DDL (a statement or a list of statements) only runs if
+# the column / index does not exist yet. A callable step receives the backend
+# and returns its dialect's statement (None to skip).
+SCHEMA_MIGRATIONS = [
+    ("column", "created_at",
+     "ALTER TABLE data ADD COLUMN created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP"),
+    ("index", "idx_data_created_at", "CREATE INDEX idx_data_created_at ON data (created_at)"),
+    ("index", "idx_data_decision", "CREATE INDEX idx_data_decision ON data (decision)"),
+    ("index", "idx_data_city", "CREATE INDEX idx_data_city ON data (city)"),
+    # Applicants-tab search: exact phone, name prefix (CNIC uses uq_data_live_cnic)
+    ("index", "idx_data_phone", "CREATE INDEX idx_data_phone ON data (phone_number)"),
+    ("index", "idx_data_name", [lambda backend: backend.name_index_sql]),
+    # NULL for rows saved before scores were stored, and for early rejections
+    ("column", "final_score", "ALTER TABLE data ADD COLUMN final_score DECIMAL(6,2) NULL"),
+    # Soft delete tombstone (before data_summary, whose backfill skips tombstoned rows)
+    ("column", "deleted_at", "ALTER TABLE data ADD COLUMN deleted_at TIMESTAMP NULL"),
+    # One live row per CNIC (a tombstone's CNIC can be saved again). Backfill
+    # canonical CNICs first, otherwise "12345-1234567-1" and "1234512345671"
+    # would both survive as distinct keys
+    ("column", "is_live", [lambda backend: backend.live_column_sql]),
+    ("index", "uq_data_live_cnic", [
+        lambda backend: backend.normalize_cnics_sql,
+        lambda backend: backend.live_unique_index_sql("uq_data_live_cnic", "cnic"),
+    ]),
+    ("table", "data_summary", [SUMMARY_TABLE_SQL, SUMMARY_BACKFILL_SQL]),
+    *(
+        ("column", col, f"ALTER TABLE data ADD COLUMN {col} {sql_type} NULL")
+        for col, sql_type in SCORING_COLUMN_TYPES.items()
+    ),
+    # Stale-row counts after a scorecard change: live total minus the rows on the current version
+    ("index", "idx_data_scorecard_version", "CREATE INDEX idx_data_scorecard_version ON data (scorecard_version)"),
+    # Live-row listing / counts skip tombstones; the purge job finds them by deleted_at
+    ("index", "idx_data_live", [lambda backend: backend.live_index_sql("idx_data_live", "id")]),
+    ("index", "idx_data_deleted_at", [lambda backend: backend.tombstone_index_sql]),
+]
+
+# Indexes superseded by a migration above, as (old, replacement): the old one
+# is dropped once its replacement exists
+RETIRED_INDEXES = [
+    ("uq_data_cnic", "uq_data_live_cnic"),   # unique over every row, tombstones included
+]
+
+# False until uq_data_live_cnic exists; save_to_db falls back to a pre-check meanwhile
+_unique_cnic_enforced = False
+
+
+def unique_cnic_enforced() -> bool:
+    """ Whether uq_data_live_cnic rejects duplicate inserts; until then writers pre-check with CNIC_EXISTS_SQL """
+    get_pool()   # runs ensure_schema on first use
+    return _unique_cnic_enforced
+
+
+def ensure_schema(pool: ConnectionPool):
+    """ Apply pending SCHEMA_MIGRATIONS; a failing one is logged and skipped so the app still starts """
+    global _unique_cnic_enforced
+    backend = pool.backend
+
+    conn = pool.checkout()
+    try:
+        cursor = conn.cursor()
+        cursor.execute(backend.create_table_sql(APPLICANT_COLUMN_TYPES))
+        conn.commit()
+        for kind, name, ddl in SCHEMA_MIGRATIONS:
+            if backend.schema_object_exists(cursor, kind, name):
+                continue
+            try:
+                for step in ([ddl] if isinstance(ddl, str) else ddl):
+                    statement = step(backend) if callable(step) else step
+                    if statement:
+                        cursor.execute(statement)
+                conn.commit()
+            except backend.Error as e:
+                conn.rollback()
+                logger.error("Schema migration %s failed: %s", name, e)
+        for old, replacement in RETIRED_INDEXES:
+            if not (backend.schema_object_exists(cursor, "index", old)
+                    and backend.schema_object_exists(cursor, "index", replacement)):
+                continue
+            try:
+                cursor.execute(backend.drop_index_sql(old))
+                conn.commit()
+            except backend.Error as e:
+                conn.rollback()
+                logger.error("Dropping retired index %s failed: %s", old, e)
+        _unique_cnic_enforced = backend.schema_object_exists(cursor, "index", "uq_data_live_cnic")
+        cursor.close()
+    finally:
+        conn.close()
+
+
+@instrumented("db.find_duplicate_cnics", rows=len)
+def find_duplicate_cnics() -> "pd.DataFrame":
+    """ Live CNICs stored more than once when dashes are ignored — these block uq_data_live_cnic """
+    import pandas as pd
+
+    query = f"""
+    SELECT {CNIC_DIGITS_SQL} AS cnic_digits, COUNT(*) AS copies, {_backend.group_ids_sql()} AS ids
+    FROM data
+    WHERE {LIVE_ROWS_SQL}
+    GROUP BY cnic_digits
+    HAVING COUNT(*) > 1
+    ORDER BY cnic_digits
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query)
+        rows = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(rows, columns=["cnic_digits", "copies", "ids"])
+
+
+# Columns of the `data` table in the exact order we pass values
+APPLICANT_COLUMNS = [
+    "applicant_type", "name", "cnic", "license_no",
+    "phone_number", "gender",
+    "guarantors", "female_guarantor", "electricity_bill", "pdc_option",
+    "education", "occupation", "designation",
+    "employer_name", "employer_contact",
+    "address", "city", "state_province", "postal_code", "country",
+    "net_salary", "applicant_bank_balance", "guarantor_bank_balance",
+    "employer_type", "age", "residence",
+    "bike_type", "bike_price", "down_payment", "tenure", "emi",
+    "outstanding", "salary_consistency", "job_years", "dependents", "tax_return",
+    *COMPONENT_SCORE_COLUMNS, "dti_ratio",
+    "final_score", "decision", "reject_reason", "scorecard_version"
+]
+
+_MONEY_COLUMNS = {
+    "net_salary", "applicant_bank_balance", "guarantor_bank_balance",
+    "bike_price", "down_payment", "emi", "outstanding",
+}
+APPLICANT_COLUMN_TYPES = {
+    col: "DECIMAL(14,2)" if col in _MONEY_COLUMNS
+    else SCORING_COLUMN_TYPES[col] if col in SCORING_COLUMN_TYPES
+    else "DECIMAL(6,2)" if col == "final_score"
+    else "INT" if col in ("age", "tenure")
+    else "VARCHAR(255)"
+    for col in APPLICANT_COLUMNS
+}
+
+
+def applicant_values(data: dict) -> tuple:
+    """ Map a form-style applicant dict to a tuple in APPLICANT_COLUMNS order """
+    full_name = f"{data['first_name']} {data['last_name']}".strip()
+    full_address = f"{data['street_address']}, {data['area_address']}"
+
+    return (
+        data["applicant_type"],
+        full_name, data["cnic"], data["license_no"],
+        data["phone_number"], data["gender"],
+        data["guarantors"], data["female_guarantor"], data["electricity_bill"], data["pdc_option"],
+        data.get("education"), data.get("occupation"), data.get("designation"),
+        data.get("employer_name"), data.get("employer_contact"),
+        full_address, data["city"], data["state_province"], data["postal_code"], data["country"],
+        data["net_salary"], data["applicant_bank_balance"], data.get("guarantor_bank_balance"),
+        data["employer_type"], data["age"], data["residence"],
+        data["bike_type"], data["bike_price"], data["down_payment"], data["tenure"], data["emi"], data["outstanding"],
+        *(data.get(col) for col in SCORING_INPUT_COLUMNS),
+        *(data.get(col) for col in COMPONENT_SCORE_COLUMNS), data.get("dti_ratio"),
+        data.get("final_score"), data["decision"], data.get("reject_reason"), data.get("scorecard_version")
+    )
+
+
+def score_fields(result) -> dict:
+    """ The stored score columns for a ScoreResult; early rejections keep their components but no final score """
+    return {
+        **{f"{c}_score": getattr(result, c) for c in COMPONENTS},
+        "dti_ratio": result.ratio,
+        "final_score": None if result.reject_reason else result.final_score,
+        "decision": result.decision,
+        "reject_reason": result.reject_reason,
+        "scorecard_version": result.scorecard_version,
+    }
+
+
+def insert_query() -> str:
+    # Build placeholders dynamically so counts always match
+    placeholders = ", ".join(["%s"] * len(APPLICANT_COLUMNS))
+    cols_sql = ", ".join(APPLICANT_COLUMNS)
+    return f"INSERT INTO data ({cols_sql}) VALUES ({placeholders})"
+
+
+DUPLICATE_CNIC_MESSAGE = "❌ CNIC already exists in the database. Please enter a unique CNIC."
+
+
+def _insert_applicants(cursor, records) -> list:
+    """ INSERT each applicant on `cursor` (caller commits); ValueError on a duplicate CNIC """
+    ids = []
+    for data in records:
+        data = {**data, "cnic": normalize_cnic(data["cnic"])}
+
+        # --- Check if CNIC already exists (only until the unique index is in place) ---
+        if not _unique_cnic_enforced:
+            cursor.execute(CNIC_EXISTS_SQL, (data["cnic"],))
+            (exists,) = cursor.fetchone()
+            if exists > 0:
+                raise ValueError(DUPLICATE_CNIC_MESSAGE)
+
+        # Single statement: uq_data_live_cnic rejects duplicates, even concurrent ones
+        try:
+            ids.append(_backend.insert(cursor, insert_query(), applicant_values(data)))
+        except Exception as e:
+            if _backend.is_duplicate_key(e):
+                raise ValueError(DUPLICATE_CNIC_MESSAGE) from e
+            raise
+    _apply_summary(cursor, records)
+    return ids
+
+
+@instrumented("db.save_to_db", rows=lambda _: 1)
+def save_to_db(data: dict):
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        (applicant_id,) = _insert_applicants(cursor, [data])
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+    return applicant_id
+
+
+@instrumented("db.save_many_to_db", rows=len)
+def save_many_to_db(records: list) -> list:
+    """ Insert several applicants in one transaction — all or none; returns their ids """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        ids = _insert_applicants(cursor, records)
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+    return ids
+
+
+@instrumented("db.fetch_all_applicants", rows=len)
+@cached_read
+def fetch_all_applicants():
+    import pandas as pd
+
+    query = """
+    SELECT
+        id,
+        applicant_type,
+        name,
+        cnic,
+        license_no,
+        phone_number,
+        gender,
+        guarantors,
+        female_guarantor,
+        electricity_bill,
+        pdc_option,
+        education,
+        occupation,
+        designation,
+        employer_name,
+        employer_contact,
+        address,
+        city,
+        state_province,
+        postal_code,
+        country,
+        net_salary,
+        applicant_bank_balance,
+        guarantor_bank_balance,
+        employer_type,
+        age,
+        residence,
+        bike_type,
+        bike_price,
+        down_payment,
+        tenure,
+        emi,
+        outstanding,
+        decision
+    FROM data
+    WHERE deleted_at IS NULL
+    ORDER BY id ASC;
+    """
+    with db_connection() as conn:
+        return pd.read_sql(query, conn)
+
+
+# -----------------------------
+# Paged Listing
+# -----------------------------
+PAGE_SIZE = 50
+PAGE_COLUMNS = ["id"] + APPLICANT_COLUMNS + ["created_at"]
+
+# Soft-deleted applicants keep their row, with deleted_at set, until purge_deleted removes it
+LIVE_ROWS_SQL = "deleted_at IS NULL"
+CNIC_EXISTS_SQL = f"SELECT COUNT(*) FROM data WHERE cnic = %s AND {LIVE_ROWS_SQL}"
+
+
+def filter_sql(filters: dict | None, live: bool = True):
+    """
+    Turn Applicants-tab filters into a WHERE clause and its parameters.
+
+    Supported keys: decision / bike_type / applicant_type (lists of values),
+    city (exact match) and date_from / date_to (inclusive dates on created_at).
+    Soft-deleted rows are excluded unless `live` is False (data_summary has
+    no deleted_at column).
+    """
+    filters = filters or {}
+    clauses, params = [LIVE_ROWS_SQL] if live else [], []
+
+    for col in ("decision", "bike_type", "applicant_type"):
+        values = filters.get(col)
+        if values:
+            clauses.append(f"{col} IN ({', '.join(['%s'] * len(values))})")
+            params.extend(values)
+    if filters.get("city"):
+        clauses.append("city = %s")
+        params.append(filters["city"])
+    if filters.get("date_from"):
+        clauses.append("created_at >= %s")
+        params.append(filters["date_from"])
+    if filters.get("date_to"):
+        # Inclusive end date: everything before the start of the next day
+        clauses.append("created_at < %s")
+        params.append(filters["date_to"] + timedelta(days=1))
+
+    where = " AND ".join(clauses)
+    return where, params
+
+
+@instrumented("db.count_applicants")
+@cached_read
+def count_applicants(filters: dict | None = None) -> int:
+    where, params = filter_sql(filters)
+    query = "SELECT COUNT(*) FROM data" + (f" WHERE {where}" if where else "")
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        (total,) = cursor.fetchone()
+        cursor.close()
+    return total
+
+
+@instrumented("db.fetch_applicants_page", rows=len)
+@cached_read
+def fetch_applicants_page(filters: dict | None = None, after_id=None, page_size: int = PAGE_SIZE,
+                          descending: bool = False) -> "pd.DataFrame":
+    """
+    One page of applicants using keyset pagination on `id`.
+
+    `after_id` is the last id of the previous page (None for the first page);
+    with `descending=True` pages walk from the newest id downwards. Only
+    `page_size` rows are read, however large the table is.
+    """
+    import pandas as pd
+
+    where, params = filter_sql(filters)
+    clauses = [where] if where else []
+    if after_id is not None:
+        clauses.append("id < %s" if descending else "id > %s")
+        params.append(int(after_id))
+
+    query = f"SELECT {', '.join(PAGE_COLUMNS)} FROM data"
+    if clauses:
+        query += " WHERE " + " AND ".join(clauses)
+    query += f" ORDER BY id {'DESC' if descending else 'ASC'} LIMIT %s"
+    params.append(int(page_size))
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(rows, columns=PAGE_COLUMNS)
+
+
+SEARCH_LIMIT = 50
+
+
+def search_sql(term: str):
+    """
+    (WHERE clause, parameters, ORDER BY) for an Applicants-tab search: a CNIC
+    (dashed or not) or an 11-digit phone number matches exactly, anything else
+    is a case-insensitive name prefix. Each form is served by its own index.
+    """
+    term = term.strip()
+    digits = term.replace("-", "").replace(" ", "")
+    if len(digits) == 13 and digits.isdigit():
+        return "cnic = %s", [normalize_cnic(digits)], "id"
+    if validate_phone(digits):
+        return "phone_number = %s", [digits], "id"
+    # Drop LIKE wildcards so the prefix stays a prefix (and index-friendly)
+    prefix = term.replace("%", "").replace("_", "")
+    return _backend.name_prefix_sql, [prefix + "%"], f"{_backend.name_order_sql}, id"
+
+
+@instrumented("db.search_applicants", rows=len)
+@cached_read
+def search_applicants(term: str, limit: int = SEARCH_LIMIT) -> "pd.DataFrame":
+    """ Up to `limit` applicants matching `term` (see search_sql) """
+    import pandas as pd
+
+    where, params, order = search_sql(term)
+    query = (
+        f"SELECT {', '.join(PAGE_COLUMNS)} FROM data WHERE {LIVE_ROWS_SQL} AND {where} ORDER BY {order} LIMIT %s"
+    )
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params + [int(limit)])
+        rows = cursor.fetchall()
+        cursor.close()
+    return pd.DataFrame(rows, columns=PAGE_COLUMNS)
+
+
+@instrumented("db.fetch_applicant")
+def fetch_applicant(applicant_id: int) -> dict | None:
+    """ Primary-key lookup of one applicant's id, name and CNIC; None if there is no such (live) id """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT id, name, cnic FROM data WHERE id = %s AND {LIVE_ROWS_SQL}", (int(applicant_id),))
+        row = cursor.fetchone()
+        cursor.close()
+    return dict(zip(("id", "name", "cnic"), row)) if row else None
+
+
+@instrumented("db.resequence_ids")
+def resequence_ids():
+    """
+    Offline compaction: renumber IDs 1..N and reset the id sequence.
+
+    This rewrites the primary key of every row and takes metadata locks, so
+    it is not wired to the UI — run it from the command line during a
+    maintenance window (`python db.py resequence-ids --yes`). The Applicants
+    tab shows a gap-free "Sr. No." column instead.
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        for statement in _backend.resequence_sql():
+            cursor.execute(statement)
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+
+
+def _ids_where(ids, decision: str | None = None, deleted: bool = False):
+    """ `id IN (...)` over live (or, `deleted`, soft-deleted) rows, optionally narrowed to one decision """
+    ids = [int(i) for i in ids]
+    where = f"id IN ({', '.join(['%s'] * len(ids))}) AND deleted_at IS {'NOT NULL' if deleted else 'NULL'}"
+    if decision is not None:
+        where += " AND decision = %s"
+        ids.append(decision)
+    return where, ids
+
+
+def _locked_summary_rows(cursor, where: str, params) -> list:
+    """ Summary inputs of the rows about to change, locked until the caller commits """
+    cursor.execute(
+        f"SELECT {', '.join(SUMMARY_SOURCE_COLUMNS)} FROM data WHERE {where}{_backend.for_update_sql}", params
+    )
+    return [dict(zip(SUMMARY_SOURCE_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def count_selected(ids, decision: str | None = None) -> int:
+    """ How many of `ids` exist (and have `decision`): the preview for a bulk action """
+    if not ids:
+        return 0
+    where, params = _ids_where(ids, decision)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM data WHERE {where}", params)
+        (total,) = cursor.fetchone()
+        cursor.close()
+    return total
+
+
+@instrumented("db.delete_applicant", rows=lambda deleted: deleted)
+def delete_applicant(applicant_id: int) -> int:
+    return delete_applicants([applicant_id])
+
+
+@instrumented("db.delete_applicants", rows=lambda deleted: deleted)
+def delete_applicants(ids) -> int:
+    """
+    Soft-delete every applicant in `ids` with one `UPDATE ... WHERE id IN (...)`;
+    returns rows deleted. They vanish from every read and the portfolio at
+    once, can be brought back with restore_applicants, and are physically
+    removed by purge_deleted after PURGE_AFTER_SECONDS.
+    """
+    if not ids:
+        return 0
+    where, params = _ids_where(ids)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        removed = _locked_summary_rows(cursor, where, params)
+        cursor.execute(f"UPDATE data SET deleted_at = %s WHERE {where}", [_utc_now()] + params)
+        deleted = cursor.rowcount
+        _apply_summary(cursor, removed, sign=-1)
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+    return deleted
+
+
+def _restorable_ids(cursor, ids) -> list:
+    """
+    The tombstones among `ids` that can go live again (locked until the caller
+    commits): one per CNIC, the newest, and none whose CNIC has been saved
+    again on a live row since the delete.
+    """
+    where, params = _ids_where(ids, deleted=True)
+    cursor.execute(f"SELECT id, cnic FROM data WHERE {where} ORDER BY id{_backend.for_update_sql}", params)
+    newest = {cnic: applicant_id for applicant_id, cnic in cursor.fetchall()}
+    if not newest:
+        return []
+    cnics = list(newest)
+    cursor.execute(
+        f"SELECT cnic FROM data WHERE cnic IN ({', '.join(['%s'] * len(cnics))}) AND {LIVE_ROWS_SQL}", cnics
+    )
+    taken = {cnic for (cnic,) in cursor.fetchall()}
+    return [applicant_id for cnic, applicant_id in newest.items() if cnic not in taken]
+
+
+@instrumented("db.restore_applicants", rows=lambda restored: restored)
+def restore_applicants(ids) -> int:
+    """
+    Undo delete_applicants for the ids not purged yet; returns rows restored.
+    Rows whose CNIC belongs to a live applicant again stay deleted.
+    """
+    if not ids:
+        return 0
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        restorable = _restorable_ids(cursor, ids)
+        if not restorable:
+            conn.rollback()
+            cursor.close()
+            return 0
+        where, params = _ids_where(restorable, deleted=True)
+        restored_rows = _locked_summary_rows(cursor, where, params)
+        try:
+            cursor.execute(f"UPDATE data SET deleted_at = NULL WHERE {where}", params)
+        except Exception as e:
+            if _backend.is_duplicate_key(e):   # the CNIC was saved again concurrently
+                raise ValueError(DUPLICATE_CNIC_MESSAGE) from e
+            raise
+        restored = cursor.rowcount
+        _apply_summary(cursor, restored_rows)
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+    return restored
+
+
+BULK_DECISIONS = ("Approved", "Reject")
+
+
+@instrumented("db.move_decisions", rows=lambda moved: moved)
+def move_decisions(ids, to_decision: str, from_decision: str = "Review") -> int:
+    """
+    Set `to_decision` on the applicants in `ids` that are still `from_decision`,
+    in one UPDATE; rows already decided otherwise are left alone. Returns rows moved.
+    """
+    if to_decision not in BULK_DECISIONS:
+        raise ValueError(f"❌ Bulk updates can only set {' or '.join(BULK_DECISIONS)}")
+    if not ids:
+        return 0
+    where, params = _ids_where(ids, from_decision)
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        moved_rows = _locked_summary_rows(cursor, where, params)
+        cursor.execute(f"UPDATE data SET decision = %s WHERE {where}", [to_decision] + params)
+        moved = cursor.rowcount
+        _apply_summary(cursor, moved_rows, sign=-1)
+        _apply_summary(cursor, [{**row, "decision": to_decision} for row in moved_rows])
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+    return moved
+
+
+# -----------------------------
+# Soft Delete Purge
+# -----------------------------
+DELETE_UNDO_SECONDS = float(os.environ.get("DELETE_UNDO_SECONDS", "120"))     # Undo button shown this long
+PURGE_AFTER_SECONDS = float(os.environ.get("PURGE_AFTER_SECONDS", "86400"))   # tombstones restorable this long (> undo)
+PURGE_BATCH_SIZE = int(os.environ.get("PURGE_BATCH_SIZE", "500"))             # rows per DELETE transaction
+PURGE_INTERVAL = float(os.environ.get("PURGE_INTERVAL", "600"))               # seconds between background purges
+
+
+def _utc_now() -> datetime:
+    """ Naive UTC timestamp, the same convention for writing deleted_at and for purge cutoffs """
+    return datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+
+
+@instrumented("db.purge_deleted", rows=lambda purged: purged)
+def purge_deleted(older_than: float = PURGE_AFTER_SECONDS, batch_size: int = PURGE_BATCH_SIZE) -> int:
+    """
+    Physically remove applicants soft-deleted more than `older_than` seconds
+    ago, `batch_size` primary keys per short transaction so no lock is held
+    for long; returns rows removed. data_summary already excludes them.
+    """
+    cutoff = _utc_now() - timedelta(seconds=older_than)
+    purged = 0
+    while True:
+        with db_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "SELECT id FROM data WHERE deleted_at IS NOT NULL AND deleted_at < %s ORDER BY deleted_at LIMIT %s",
+                (cutoff, int(batch_size)),
+            )
+            ids = [row[0] for row in cursor.fetchall()]
+            if ids:
+                # Re-checked in the DELETE in case one was restored meanwhile
+                where, params = _ids_where(ids, deleted=True)
+                cursor.execute(f"DELETE FROM data WHERE {where} AND deleted_at < %s", params + [cutoff])
+                purged += cursor.rowcount
+            conn.commit()
+            cursor.close()
+        if len(ids) < batch_size:
+            break
+    if purged:
+        invalidate_cache()
+    return purged
+
+
+def _run_purger():
+    while True:
+        time.sleep(PURGE_INTERVAL)   # first pass after one interval, not during app startup
+        try:
+            purge_deleted()
+        except Exception:
+            logger.exception("Purge of deleted applicants failed")
+
+
+_purger = None
+_purger_lock = threading.Lock()
+
+
+def start_purger():
+    """ Start this process's background purge thread once; several app processes purging is harmless """
+    global _purger
+    if _purger is not None:
+        return
+    with _purger_lock:
+        if _purger is None:
+            _purger = threading.Thread(target=_run_purger, name="purge-deleted", daemon=True)
+            _purger.start()
+
+
+# -----------------------------
+# Portfolio Summary
+# -----------------------------
+# Applicant fields that feed data_summary
+SUMMARY_SOURCE_COLUMNS = SUMMARY_DIMENSIONS + ["final_score", "bike_price", "down_payment", "emi"]
+
+
+def _number(value) -> float:
+    return 0.0 if value is None else float(value)
+
+
+def summary_deltas(records, sign: int = 1) -> list:
+    """ data_summary rows (SUMMARY_DIMENSIONS + SUMMARY_COUNTERS) adding (or, sign=-1, removing) `records` """
+    groups = {}
+    for rec in records:
+        key = tuple(str(rec.get(d) or "")[:SUMMARY_KEY_LENGTH] for d in SUMMARY_DIMENSIONS)
+        counters = groups.setdefault(key, [0, 0, 0.0, 0.0, 0.0])
+        score, price, down = rec.get("final_score"), rec.get("bike_price"), rec.get("down_payment")
+        counters[0] += sign
+        counters[1] += sign * (score is not None)
+        counters[2] += sign * _number(score)
+        # Same NULL handling as SUM(bike_price - down_payment) in SUMMARY_BACKFILL_SQL
+        counters[3] += sign * (float(price) - float(down) if price is not None and down is not None else 0.0)
+        counters[4] += sign * _number(rec.get("emi"))
+    return [key + tuple(counters) for key, counters in groups.items()]
+
+
+def summary_upsert_query(backend: StorageBackend | None = None) -> str:
+    return (backend or _backend).accumulate_sql("data_summary", SUMMARY_DIMENSIONS, SUMMARY_COUNTERS)
+
+
+def _apply_summary(cursor, records, sign: int = 1):
+    """ Fold `records` into data_summary inside the caller's transaction """
+    deltas = summary_deltas(records, sign)
+    if deltas:
+        cursor.executemany(summary_upsert_query(), deltas)
+
+
+@instrumented("db.rebuild_summary")
+def rebuild_summary():
+    """ Recompute data_summary from `data` (after manual SQL edits, or if totals ever drift) """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute("DELETE FROM data_summary")
+        cursor.execute(SUMMARY_BACKFILL_SQL)
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+
+
+PORTFOLIO_GROUPS = ["city", "bike_type", "applicant_type", "decision"]
+
+
+@instrumented("db.portfolio_aggregates", rows=len)
+@cached_read
+def portfolio_aggregates(group_by: str, filters: dict | None = None) -> "pd.DataFrame":
+    """
+    Approval rate, average final score, exposure and EMI totals per `group_by`
+    value, computed in SQL.
+
+    Served from data_summary (O(groups)) unless a date range is filtered on,
+    which needs `data` itself (via idx_data_created_at).
+    """
+    import pandas as pd
+
+    if group_by not in PORTFOLIO_GROUPS:
+        raise ValueError(f"❌ Unknown portfolio grouping: {group_by}")
+    filters = filters or {}
+    by_date = bool(filters.get("date_from") or filters.get("date_to"))
+    where, params = filter_sql(filters, live=by_date)
+
+    if by_date:
+        source = "data"
+        applicants, approved = "COUNT(*)", "SUM(CASE WHEN decision = 'Approved' THEN 1 ELSE 0 END)"
+        scored, score_sum = "COUNT(final_score)", "SUM(final_score)"
+        exposure, emi = "SUM(bike_price - down_payment)", "SUM(emi)"
+        group = f"COALESCE({group_by}, '')"
+    else:
+        source = "data_summary"   # same column names, so filter_sql's WHERE applies unchanged (tombstones are never in it)
+        applicants, approved = "SUM(applicants)", "SUM(CASE WHEN decision = 'Approved' THEN applicants ELSE 0 END)"
+        scored, score_sum = "SUM(scored)", "SUM(score_sum)"
+        exposure, emi = "SUM(exposure_sum)", "SUM(emi_sum)"
+        group = group_by
+
+    query = f"""
+        SELECT {group} AS grp, {applicants} AS applicants, {approved} AS approved,
+               {scored} AS scored, {score_sum} AS score_sum, {exposure} AS exposure, {emi} AS emi_total
+        FROM {source}
+        {f"WHERE {where}" if where else ""}
+        GROUP BY 1
+        HAVING {applicants} > 0
+        ORDER BY 2 DESC
+    """
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        cursor.close()
+
+    df = pd.DataFrame(rows, columns=["grp", "applicants", "approved", "scored", "score_sum", "exposure", "emi_total"])
+    for col in ["applicants", "approved", "scored", "score_sum", "exposure", "emi_total"]:
+        df[col] = pd.to_numeric(df[col]).fillna(0)
+    df["approval_rate"] = df["approved"] / df["applicants"]
+    df["avg_final_score"] = (df["score_sum"] / df["scored"]).where(df["scored"] > 0)
+    df = df.rename(columns={"grp": group_by})
+    return df[[group_by, "applicants", "approved", "approval_rate", "scored", "avg_final_score", "exposure", "emi_total"]]
+
+
+# -----------------------------
+# Bulk Import
+# -----------------------------
+BULK_CHUNK_SIZE = 1000
+
+# Columns a spreadsheet row must have a value for
+BULK_REQUIRED_COLUMNS = [
+    "applicant_type", "name", "cnic", "phone_number", "gender",
+    "city", "country",
+    "net_salary", "applicant_bank_balance",
+    "bike_type", "bike_price", "down_payment", "tenure", "emi",
+    "decision",
+]
+BULK_NUMERIC_COLUMNS = [
+    "net_salary", "applicant_bank_balance", "guarantor_bank_balance",
+    "age", "bike_price", "down_payment", "tenure", "emi", "outstanding", "final_score",
+    "salary_consistency", "job_years", "dependents", *COMPONENT_SCORE_COLUMNS, "dti_ratio",
+]
+
+
+def read_applicant_file(uploaded_file) -> "pd.DataFrame":
+    """ Read an uploaded CSV/XLSX as strings so CNICs and phone numbers keep leading zeros """
+    import pandas as pd
+
+    name = getattr(uploaded_file, "name", str(uploaded_file)).lower()
+    if name.endswith((".xlsx", ".xls")):
+        return pd.read_excel(uploaded_file, dtype=str)
+    return pd.read_csv(uploaded_file, dtype=str)
+
+
+def _normalize_import_frame(raw: "pd.DataFrame") -> "pd.DataFrame":
+    """
+    Bring a dealer spreadsheet into the `data` column layout.
+
+    Headers are matched case-insensitively ("Net Salary" -> net_salary).
+    Either the table layout (name, address) or the form layout
+    (first_name/last_name, street_address/area_address) is accepted.
+    """
+    import pandas as pd
+
+    df = raw.copy()
+    df.columns = [str(c).strip().lower().replace(" ", "_") for c in df.columns]
+    df = df.apply(lambda col: col.str.strip() if pd.api.types.is_string_dtype(col) else col)
+    df = df.replace({"": None})
+
+    if "name" not in df.columns and {"first_name", "last_name"} <= set(df.columns):
+        df["name"] = (df["first_name"].fillna("") + " " + df["last_name"].fillna("")).str.strip()
+    if "address" not in df.columns and {"street_address", "area_address"} <= set(df.columns):
+        df["address"] = df["street_address"].fillna("") + ", " + df["area_address"].fillna("")
+
+    for col in APPLICANT_COLUMNS:
+        if col not in df.columns:
+            df[col] = None
+    df["outstanding"] = df["outstanding"].fillna("0")
+    df["cnic"] = df["cnic"].map(normalize_cnic, na_action="ignore")
+
+    return df[APPLICANT_COLUMNS]
+
+
+def _invalid_reason(row) -> str:
+    import pandas as pd
+
+    missing = [c for c in BULK_REQUIRED_COLUMNS if pd.isna(row[c])]
+    if missing:
+        return f"Missing {', '.join(missing)}"
+    if not validate_cnic(row["cnic"]):
+        return "Invalid CNIC format"
+    if not validate_phone(row["phone_number"]):
+        return "Invalid phone number"
+    for col in BULK_NUMERIC_COLUMNS:
+        if pd.notna(row[col]) and pd.isna(pd.to_numeric(row[col], errors="coerce")):
+            return f"{col} is not a number"
+    return ""
+
+
+def _db_value(v):
+    """ NaN -> NULL and NumPy scalars -> plain Python values for the driver """
+    import pandas as pd
+
+    if pd.isna(v):
+        return None
+    return v.item() if hasattr(v, "item") else v
+
+
+@instrumented("db.bulk_import_applicants", rows=lambda report: int((report["status"] == "inserted").sum()))
+def bulk_import_applicants(raw: "pd.DataFrame", chunk_size: int = BULK_CHUNK_SIZE) -> "pd.DataFrame":
+    """
+    Insert many applicants at once.
+
+    Rows are validated locally, CNIC duplicates (against the table and within
+    the file) are found with chunked `WHERE cnic IN (...)` queries, and the
+    remaining rows are inserted with chunked `executemany` calls inside one
+    transaction — either every valid row lands or none does.
+
+    Returns a per-row report with columns: row, cnic, status
+    ("inserted" / "duplicate" / "invalid") and reason.
+    """
+    import pandas as pd
+
+    df = _normalize_import_frame(raw)
+    report = pd.DataFrame({
+        "row": range(1, len(df) + 1),
+        "cnic": df["cnic"].to_numpy(),
+        "status": "inserted",
+        "reason": "",
+    }, index=df.index)
+
+    reasons = df.apply(_invalid_reason, axis=1) if len(df) else pd.Series(dtype=str)
+    invalid = reasons != ""
+    report.loc[invalid, "status"] = "invalid"
+    report.loc[invalid, "reason"] = reasons[invalid]
+
+    file_dupes = ~invalid & df["cnic"].duplicated(keep="first")
+    report.loc[file_dupes, "status"] = "duplicate"
+    report.loc[file_dupes, "reason"] = "CNIC repeated in file"
+
+    candidates = report["status"] == "inserted"
+    if not candidates.any():
+        return report
+
+    with db_connection() as conn:
+        cursor = conn.cursor()
+
+        cnics = df.loc[candidates, "cnic"].tolist()
+        existing = set()
+        # Chunked so the parameter count stays under SQLite's variable limit
+        for start in range(0, len(cnics), chunk_size):
+            chunk = cnics[start:start + chunk_size]
+            placeholders = ", ".join(["%s"] * len(chunk))
+            cursor.execute(f"SELECT cnic FROM data WHERE cnic IN ({placeholders}) AND {LIVE_ROWS_SQL}", chunk)
+            existing.update(cnic for (cnic,) in cursor.fetchall())
+
+        db_dupes = candidates & df["cnic"].isin(existing)
+        report.loc[db_dupes, "status"] = "duplicate"
+        report.loc[db_dupes, "reason"] = "CNIC already exists in the database"
+
+        to_insert = df[report["status"] == "inserted"].copy()
+        for col in BULK_NUMERIC_COLUMNS:
+            to_insert[col] = pd.to_numeric(to_insert[col], errors="coerce")
+        rows = [
+            tuple(_db_value(v) for v in row)
+            for row in to_insert.itertuples(index=False, name=None)
+        ]
+
+        query = insert_query()
+        for start in range(0, len(rows), chunk_size):
+            cursor.executemany(query, rows[start:start + chunk_size])
+        _apply_summary(cursor, (dict(zip(APPLICANT_COLUMNS, row)) for row in rows))
+        conn.commit()
+        cursor.close()
+    invalidate_cache()
+
+    return report
+
+
+# -----------------------------
+# Maintenance Commands
+# -----------------------------
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="EV Bike Finance Portal database maintenance")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    reseq = commands.add_parser("resequence-ids", help="Renumber applicant IDs 1..N (locks the table)")
+    reseq.add_argument("--yes", action="store_true", help="Confirm the table rewrite")
+
+    commands.add_parser("find-duplicate-cnics", help="List CNICs stored more than once (blocks the unique index)")
+    commands.add_parser("rebuild-summary", help="Recompute the data_summary portfolio totals from data")
+    purge = commands.add_parser("purge-deleted", help="Remove soft-deleted applicants past the undo period")
+    purge.add_argument("--older-than", type=float, default=PURGE_AFTER_SECONDS,
+                       help="seconds since deletion (default: PURGE_AFTER_SECONDS)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "resequence-ids":
+        if not args.yes:
+            parser.error("resequence-ids rewrites every primary key; re-run with --yes to confirm")
+        resequence_ids()
+        print("✅ IDs resequenced successfully!")
+    elif args.command == "find-duplicate-cnics":
+        dupes = find_duplicate_cnics()
+        if dupes.empty:
+            print("✅ No duplicate CNICs — uq_data_live_cnic can be created.")
+        else:
+            print(dupes.to_string(index=False))
+    elif args.command == "rebuild-summary":
+        rebuild_summary()
+        print("✅ Portfolio summary rebuilt.")
+    elif args.command == "purge-deleted":
+        purged = purge_deleted(args.older_than)
+        print(f"✅ Purged {purged:,} deleted applicant(s).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import csv
+import io
+import tempfile
+
+from db import COMPONENT_SCORE_COLUMNS, PAGE_COLUMNS, backend, filter_sql, db_connection
+from metrics import timed
+
+
+# -----------------------------
+# Streaming Export
+# -----------------------------
+# Exports read the applicants table through the backend's streaming
+# (server-side) cursor in EXPORT_BATCH_SIZE chunks and write each chunk straight to a
+# spooled temp file, so memory stays flat however large the table gets.
+EXPORT_BATCH_SIZE = 5000
+EXPORT_SPOOL_BYTES = 16 * 1024 * 1024   # kept in RAM below this, spilled to disk above
+
+NUMERIC_EXPORT_COLUMNS = {
+    "net_salary", "applicant_bank_balance", "guarantor_bank_balance",
+    "age", "bike_price", "down_payment", "tenure", "emi", "outstanding", "final_score",
+    "salary_consistency", "job_years", "dependents", *COMPONENT_SCORE_COLUMNS, "dti_ratio",
+}
+
+
+def iter_applicant_batches(filters: dict | None = None, batch_size: int = EXPORT_BATCH_SIZE):
+    """ Yield lists of row tuples (in PAGE_COLUMNS order), ordered by id """
+    where, params = filter_sql(filters)
+    query = f"SELECT {', '.join(PAGE_COLUMNS)} FROM data"
+    if where:
+        query += f" WHERE {where}"
+    query += " ORDER BY id ASC"
+
+    with db_connection() as conn:
+        cursor = backend().stream_cursor(conn)
+        cursor.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            yield rows
+        cursor.close()
+
+
+def _spool():
+    return tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+
+
+def export_xlsx(filters: dict | None = None):
+    """ Excel workbook written row by row in xlsxwriter's constant-memory mode """
+    import xlsxwriter
+
+    out = _spool()
+    with timed("export.xlsx") as t:
+        workbook = xlsxwriter.Workbook(out, {
+            "constant_memory": True,
+            "default_date_format": "yyyy-mm-dd hh:mm:ss",
+        })
+        sheet = workbook.add_worksheet("Applicants")
+        sheet.write_row(0, 0, PAGE_COLUMNS, workbook.add_format({"bold": True}))
+
+        row_no = 1
+        for rows in iter_applicant_batches(filters):
+            for row in rows:
+                sheet.write_row(row_no, 0, row)
+                row_no += 1
+        workbook.close()
+        t.rows = row_no - 1
+
+    out.seek(0)
+    return out
+
+
+def export_csv(filters: dict | None = None):
+    out = _spool()
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(PAGE_COLUMNS)
+    with timed("export.csv") as t:
+        for rows in iter_applicant_batches(filters):
+            writer.writerows(rows)
+            t.rows += len(rows)
+    text.flush()
+    text.detach()
+
+    out.seek(0)
+    return out
+
+
+def export_parquet(filters: dict | None = None):
+    """ Parquet file with one row group per fetched batch and a fixed schema """
+    import pandas as pd
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        (col,
+         pa.int64() if col == "id"
+         else pa.float64() if col in NUMERIC_EXPORT_COLUMNS
+         else pa.timestamp("s") if col == "created_at"
+         else pa.string())
+        for col in PAGE_COLUMNS
+    ])
+
+    out = _spool()
+    with timed("export.parquet") as t, pq.ParquetWriter(out, schema) as writer:
+        for rows in iter_applicant_batches(filters):
+            batch = pd.DataFrame(rows, columns=PAGE_COLUMNS)
+            for col in NUMERIC_EXPORT_COLUMNS:
+                batch[col] = pd.to_numeric(batch[col], errors="coerce")
+            batch["created_at"] = pd.to_datetime(batch["created_at"])
+            writer.write_table(pa.Table.from_pandas(batch, schema=schema, preserve_index=False))
+            t.rows += len(rows)
+
+    out.seek(0)
+    return out
+
+
+# label -> (writer, file name, MIME type)
+EXPORT_FORMATS = {
+    "Excel (.xlsx)": (export_xlsx, "applicants.xlsx",
+                      "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "CSV (.csv)": (export_csv, "applicants.csv", "text/csv"),
+    "Parquet (.parquet)": (export_parquet, "applicants.parquet", "application/vnd.apache.parquet"),
+}
@@ -0,0 +1,271 @@
+"""
+Write-behind queue for applicant saves.
+
+    enqueue_save(applicant_data)    # durable locally, returns at once
+    journal_stats()                 # {"pending": ..., "failed": ..., ...}
+
+The Save button appends the applicant to a local SQLite journal (fsynced
+before enqueue_save returns) instead of waiting on the remote database. A
+daemon thread per app process drains the journal in batched transactions:
+
+- database unreachable: the batch stays pending and is retried with
+  exponential backoff, so nothing is dropped;
+- any other failure (duplicate CNIC, a constraint or data error, a payload
+  the driver cannot encode): the batch is retried row by row, so the good
+  entries are stored and only the offending one is held back. A duplicate
+  CNIC is marked failed at once; other errors are retried with backoff and
+  marked failed after WRITE_MAX_ATTEMPTS, for an officer to retry or discard.
+
+Entries are deleted from the journal once committed to the database. If the
+process dies between that commit and the delete, the replayed entry is
+rejected by uq_data_live_cnic and shows up as failed rather than being stored
+twice. Keep WRITE_JOURNAL_PATH on persistent disk and use one journal file
+per app process.
+"""
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from db import db_connection, save_many_to_db
+from metrics import instrumented, register_gauges
+from scoring import normalize_cnic
+
+WRITE_JOURNAL_PATH = os.environ.get("WRITE_JOURNAL_PATH", "save_journal.db")
+WRITE_BATCH_SIZE = int(os.environ.get("WRITE_BATCH_SIZE", "50"))               # saves per DB transaction
+WRITE_POLL_INTERVAL = float(os.environ.get("WRITE_POLL_INTERVAL", "1"))        # idle seconds between drains
+WRITE_RETRY_BASE = float(os.environ.get("WRITE_RETRY_BASE", "2"))              # first backoff, doubled per attempt
+WRITE_RETRY_MAX = float(os.environ.get("WRITE_RETRY_MAX", "300"))              # backoff ceiling in seconds
+WRITE_MAX_ATTEMPTS = int(os.environ.get("WRITE_MAX_ATTEMPTS", "8"))            # attempts before a save the reachable DB rejects is failed
+
+logger = logging.getLogger(__name__)
+
+QUEUED_CNIC_MESSAGE = "❌ This applicant is already queued for saving."
+
+_JOURNAL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS journal (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cnic TEXT NOT NULL,
+    name TEXT,
+    payload TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',      -- pending / failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    next_attempt_at REAL NOT NULL DEFAULT 0,
+    last_error TEXT,
+    queued_at REAL NOT NULL
+)
+"""
+
+
+# Journal files whose schema and WAL mode (persistent in the file) are in place
+_initialized = set()
+_init_lock = threading.Lock()
+
+
+def _connect(path: str = None, write: bool = True) -> sqlite3.Connection:
+    """ Journal connection; the schema is created once per process, reads skip the fsync setting """
+    path = path or WRITE_JOURNAL_PATH
+    conn = sqlite3.connect(path, timeout=10)
+    if path not in _initialized:
+        with _init_lock:
+            if path not in _initialized:
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute(_JOURNAL_SCHEMA)
+                _initialized.add(path)
+    if write:
+        conn.execute("PRAGMA synchronous=FULL")  # a queued save survives a power cut
+    return conn
+
+
+# -----------------------------
+# Queue
+# -----------------------------
+def enqueue_save(data: dict) -> int:
+    """
+    Journal one applicant for saving and wake the writer; returns the journal
+    entry id. A save of an applicant whose earlier save failed replaces that
+    entry; a CNIC already stored in the database is caught by the writer.
+    """
+    cnic = normalize_cnic(data["cnic"])
+    name = f"{data.get('first_name', '')} {data.get('last_name', '')}".strip()
+    conn = _connect()
+    try:
+        with conn:
+            # A double-clicked Save must not queue the same applicant twice
+            (queued,) = conn.execute(
+                "SELECT COUNT(*) FROM journal WHERE cnic = ? AND status = 'pending'", (cnic,)
+            ).fetchone()
+            if queued:
+                raise ValueError(QUEUED_CNIC_MESSAGE)
+            conn.execute("DELETE FROM journal WHERE cnic = ? AND status = 'failed'", (cnic,))
+            cursor = conn.execute(
+                "INSERT INTO journal (cnic, name, payload, queued_at) VALUES (?, ?, ?, ?)",
+                (cnic, name, json.dumps(data), time.time()),
+            )
+        entry_id = cursor.lastrowid
+    finally:
+        conn.close()
+    start_writer()
+    _wake.set()
+    return entry_id
+
+
+def journal_stats() -> dict:
+    """ {"pending", "failed", "oldest_pending_s", "last_error"} for the UI and metrics """
+    conn = _connect(write=False)
+    try:
+        pending, failed, oldest = conn.execute(
+            "SELECT COALESCE(SUM(status = 'pending'), 0), COALESCE(SUM(status = 'failed'), 0), "
+            "MIN(CASE WHEN status = 'pending' THEN queued_at END) FROM journal"
+        ).fetchone()
+        (last_error,) = conn.execute(
+            "SELECT last_error FROM journal WHERE status = 'pending' AND last_error IS NOT NULL "
+            "ORDER BY id LIMIT 1"
+        ).fetchone() or (None,)
+    finally:
+        conn.close()
+    return {
+        "pending": pending,
+        "failed": failed,
+        "oldest_pending_s": time.time() - oldest if oldest else 0.0,
+        "last_error": last_error,
+    }
+
+
+def failed_saves() -> list:
+    """ [{"id", "name", "cnic", "error", "queued_at"}] for entries the database rejected """
+    conn = _connect(write=False)
+    try:
+        rows = conn.execute(
+            "SELECT id, name, cnic, last_error, queued_at FROM journal WHERE status = 'failed' ORDER BY id"
+        ).fetchall()
+    finally:
+        conn.close()
+    return [dict(zip(("id", "name", "cnic", "error", "queued_at"), row)) for row in rows]
+
+
+def retry_failed(entry_id: int):
+    _update("UPDATE journal SET status = 'pending', attempts = 0, next_attempt_at = 0 WHERE id = ?", [(entry_id,)])
+    _wake.set()
+
+
+def discard_failed(entry_id: int):
+    _update("DELETE FROM journal WHERE id = ? AND status = 'failed'", [(entry_id,)])
+
+
+def _update(query: str, rows):
+    conn = _connect()
+    try:
+        with conn:
+            conn.executemany(query, rows)
+    finally:
+        conn.close()
+
+
+# -----------------------------
+# Writer
+# -----------------------------
+def _backoff(attempts: int) -> float:
+    return min(WRITE_RETRY_MAX, WRITE_RETRY_BASE * 2 ** (attempts - 1))
+
+
+def _database_reachable() -> bool:
+    try:
+        with db_connection():
+            return True
+    except Exception:
+        return False
+
+
+def _retry_later(entries: list, error: Exception):
+    now = time.time()
+    logger.warning("Write-behind batch of %d failed, will retry: %s", len(entries), error)
+    _update(
+        "UPDATE journal SET attempts = ?, next_attempt_at = ?, last_error = ? WHERE id = ?",
+        [(attempts + 1, now + _backoff(attempts + 1), str(error), entry_id) for entry_id, attempts, _ in entries],
+    )
+
+
+def _write(entries: list) -> int:
+    """ Commit `entries` [(id, attempts, data)] in one transaction; returns how many were stored """
+    try:
+        save_many_to_db([data for _, _, data in entries])
+    except Exception as e:
+        permanent = isinstance(e, ValueError)     # duplicate CNIC
+        if not permanent and not _database_reachable():
+            # Outage: every entry would fail alike, so back off the batch as a whole
+            _retry_later(entries, e)
+            return 0
+        # Isolate the offending entry so the good ones are not held back with it
+        if len(entries) > 1:
+            return sum(_write([entry]) for entry in entries)
+        entry_id, attempts, _ = entries[0]
+        if permanent or attempts + 1 >= WRITE_MAX_ATTEMPTS:
+            logger.error("Write-behind entry %d rejected: %s", entry_id, e)
+            _update(
+                "UPDATE journal SET status = 'failed', attempts = ?, last_error = ? WHERE id = ?",
+                [(attempts + 1, str(e), entry_id)],
+            )
+        else:
+            _retry_later(entries, e)
+        return 0
+    _update("DELETE FROM journal WHERE id = ?", [(entry_id,) for entry_id, _, _ in entries])
+    return len(entries)
+
+
+@instrumented("journal.flush", rows=lambda stored: stored)
+def flush(batch_size: int = WRITE_BATCH_SIZE) -> int:
+    """ Write one batch of due entries to the database; returns how many were stored """
+    conn = _connect(write=False)
+    try:
+        rows = conn.execute(
+            "SELECT id, attempts, payload FROM journal "
+            "WHERE status = 'pending' AND next_attempt_at <= ? ORDER BY id LIMIT ?",
+            (time.time(), batch_size),
+        ).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return 0
+    return _write([(entry_id, attempts, json.loads(payload)) for entry_id, attempts, payload in rows])
+
+
+def _run():
+    while True:
+        _wake.wait(WRITE_POLL_INTERVAL)
+        _wake.clear()
+        try:
+            while flush() == WRITE_BATCH_SIZE:
+                pass
+        except Exception:
+            logger.exception("Write-behind writer error")
+
+
+_wake = threading.Event()
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def start_writer():
+    """ Start this process's background writer once (it also drains entries left by a previous run) """
+    global _writer
+    if _writer is not None:
+        return
+    with _writer_lock:
+        if _writer is None:
+            _writer = threading.Thread(target=_run, name="write-behind", daemon=True)
+            _writer.start()
+
+
+def _journal_gauges() -> dict:
+    stats = journal_stats()
+    return {
+        "journal_pending": stats["pending"],
+        "journal_failed": stats["failed"],
+        "journal_oldest_pending_seconds": stats["oldest_pending_s"],
+    }
+
+
+register_gauges(_journal_gauges)
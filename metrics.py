@@ -0,0 +1,209 @@
+"""
+Process-wide latency, row and error metrics.
+
+    @instrumented("db.fetch_all_applicants", rows=len)
+    def fetch_all_applicants(): ...
+
+    with timed("ui.tab.results") as t:
+        ...
+        t.rows = n
+
+Streamlit keeps imported modules loaded across reruns and sessions, so every
+officer's reruns land in the same histograms. `render_prometheus()` returns
+the Prometheus text exposition format; the API serves it on GET /metrics and
+the Streamlit process writes it to METRICS_FILE (for node_exporter's textfile
+collector) when that is set.
+"""
+import functools
+import os
+import threading
+import time
+
+METRICS_PREFIX = "ev_portal"
+METRICS_FILE = os.environ.get("METRICS_FILE", "")                           # empty: don't write a textfile
+METRICS_FILE_INTERVAL = float(os.environ.get("METRICS_FILE_INTERVAL", "15"))  # seconds between textfile writes
+METRICS_ADMIN_TOKEN = os.environ.get("METRICS_ADMIN_TOKEN", "")             # empty: no sidebar panel
+
+# Upper bounds in seconds; chosen around the ~1s decision-time SLO
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """ Cumulative-bucket latency histogram plus row and error counters for one operation """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)   # last slot is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.errors = 0
+
+    def observe(self, seconds: float, rows: int = 0, error: bool = False):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                break
+        else:
+            i = len(self.buckets)
+        self.counts[i] += 1
+        self.count += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+        self.rows += rows
+        self.errors += int(error)
+
+    def quantile(self, q: float) -> float:
+        """ Upper bound of the bucket holding the q-th observation (inf if it's past the last bucket) """
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for bound, n in zip(self.buckets, self.counts):
+            seen += n
+            if seen >= target:
+                return bound
+        return float("inf")
+
+
+_histograms: dict[str, Histogram] = {}
+_gauge_sources = []
+_lock = threading.Lock()
+
+
+def observe(op: str, seconds: float, rows: int = 0, error: bool = False):
+    with _lock:
+        hist = _histograms.get(op)
+        if hist is None:
+            hist = _histograms[op] = Histogram()
+        hist.observe(seconds, rows, error)
+
+
+class timed:
+    """
+    Context manager recording one `op` observation. Set `.rows` inside the
+    block to count rows. Exceptions count as errors, except Streamlit's
+    st.stop()/st.rerun() control flow, which derives from BaseException.
+    """
+
+    def __init__(self, op: str):
+        self.op = op
+        self.rows = 0
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        error = exc_type is not None and issubclass(exc_type, Exception)
+        observe(self.op, time.perf_counter() - self._start, self.rows or 0, error)
+        return False
+
+
+def instrumented(op: str, rows=None):
+    """ Decorator form of timed(); `rows(result)` gives the row count of a successful call """
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(op) as t:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    t.rows = rows(result)
+                return result
+        return wrapper
+    return decorate
+
+
+def register_gauges(source):
+    """ Add a callable returning {name: value} that is sampled whenever metrics are rendered """
+    _gauge_sources.append(source)
+
+
+def snapshot() -> dict:
+    """ {op: {"count", "errors", "rows", "avg_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"}} """
+    with _lock:
+        ops = {op: (h.count, h.errors, h.rows, h.sum, h.max,
+                    h.quantile(0.5), h.quantile(0.95), h.quantile(0.99))
+               for op, h in _histograms.items()}
+    return {
+        op: {
+            "count": count,
+            "errors": errors,
+            "rows": rows,
+            "avg_ms": total / count * 1000 if count else 0.0,
+            "p50_ms": min(p50, peak) * 1000,   # bucket bounds can overshoot the slowest call
+            "p95_ms": min(p95, peak) * 1000,
+            "p99_ms": min(p99, peak) * 1000,
+            "max_ms": peak * 1000,
+        }
+        for op, (count, errors, rows, total, peak, p50, p95, p99) in sorted(ops.items())
+    }
+
+
+def gauges() -> dict:
+    values = {}
+    for source in _gauge_sources:
+        try:
+            values.update(source())
+        except Exception:
+            pass   # a broken gauge must never break the metrics page
+    return values
+
+
+def _fmt(value: float) -> str:
+    return "+Inf" if value == float("inf") else repr(float(value))
+
+
+def render_prometheus() -> str:
+    """ All metrics in the Prometheus text exposition format (version 0.0.4) """
+    duration = f"{METRICS_PREFIX}_operation_duration_seconds"
+    lines = [
+        f"# HELP {duration} Latency of instrumented operations (UI tab blocks, DB helpers, exports, scoring).",
+        f"# TYPE {duration} histogram",
+    ]
+    with _lock:
+        ops = sorted((op, h.buckets, list(h.counts), h.count, h.sum, h.rows, h.errors)
+                     for op, h in _histograms.items())
+
+    for op, buckets, counts, count, total, _, _ in ops:
+        cumulative = 0
+        for bound, n in zip(buckets + (float("inf"),), counts):
+            cumulative += n
+            lines.append(f'{duration}_bucket{{op="{op}",le="{_fmt(bound)}"}} {cumulative}')
+        lines.append(f'{duration}_sum{{op="{op}"}} {_fmt(total)}')
+        lines.append(f'{duration}_count{{op="{op}"}} {count}')
+
+    for name, index, help_text in (
+        ("rows_total", 5, "Rows read or written by instrumented operations."),
+        ("errors_total", 6, "Instrumented operations that raised an exception."),
+    ):
+        metric = f"{METRICS_PREFIX}_operation_{name}"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        lines.extend(f'{metric}{{op="{op[0]}"}} {op[index]}' for op in ops)
+
+    for name, value in sorted(gauges().items()):
+        metric = f"{METRICS_PREFIX}_{name}"
+        lines.append(f"# TYPE {metric} gauge")
+        lines.append(f"{metric} {_fmt(value)}")
+
+    return "\n".join(lines) + "\n"
+
+
+_last_file_write = 0.0
+
+
+def write_metrics_file(path: str = METRICS_FILE, min_interval: float = METRICS_FILE_INTERVAL):
+    """ Atomically rewrite the textfile at most once per `min_interval` seconds; no-op without a path """
+    global _last_file_write
+    if not path:
+        return
+    now = time.monotonic()
+    if now - _last_file_write < min_interval:
+        return
+    _last_file_write = now
+
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(render_prometheus())
+    os.replace(tmp, path)
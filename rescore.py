@@ -0,0 +1,212 @@
+"""
+Incremental rescoring of stored applicants.
+
+    python rescore.py                                # back-test the live scorecard on stale rows (read-only)
+    python rescore.py --apply                        # write its scores and decisions to stale rows
+    python rescore.py --scorecard candidate.json     # back-test a proposed rule change over the book
+
+A row is stale when its scorecard_version differs from the scorecard's
+version, so after a scorecard.json change (with a new "version") every row
+is stale, and a candidate file with its own version back-tests the whole
+book. Rows are read in primary-key order, RESCORE_CHUNK_SIZE at a time, and
+each chunk is scored with score_batch in one vectorized pass.
+
+With --apply each chunk is updated in its own short transaction, together
+with data_summary, so an interrupted run simply resumes: rescored rows are no
+longer stale. Decisions moved by hand (bulk Review -> Approved / Reject) are
+overwritten by the scorecard's decision.
+
+Rows saved before the scoring inputs were stored (salary_consistency,
+job_years, dependents are NULL) cannot be rescored and are counted as skipped.
+"""
+import os
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+import scoring
+from db import (
+    COMPONENT_SCORE_COLUMNS, LIVE_ROWS_SQL, SUMMARY_SOURCE_COLUMNS,
+    _apply_summary, backend, db_connection, invalidate_cache,
+)
+from metrics import instrumented
+from scoring import BATCH_INPUT_DEFAULTS, BATCH_REQUIRED_COLUMNS, COMPONENTS, Scorecard, load_scorecard, score_batch
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+RESCORE_CHUNK_SIZE = int(os.environ.get("RESCORE_CHUNK_SIZE", "5000"))   # rows per read (and per transaction)
+
+# Stored columns score_batch needs, plus what data_summary is keyed and summed on
+_INPUT_COLUMNS = list(dict.fromkeys(
+    BATCH_REQUIRED_COLUMNS + list(BATCH_INPUT_DEFAULTS) + SUMMARY_SOURCE_COLUMNS
+))
+_READ_COLUMNS = ["id"] + _INPUT_COLUMNS
+_UPDATE_COLUMNS = COMPONENT_SCORE_COLUMNS + ["dti_ratio", "final_score", "decision", "reject_reason", "scorecard_version"]
+
+
+@dataclass
+class RescoreReport:
+    """ Outcome of one rescoring run; `transitions` counts (stored decision, new decision) pairs """
+    scorecard_version: str
+    applied: bool
+    rescored: int = 0
+    skipped: int = 0
+    transitions: Counter = field(default_factory=Counter)
+
+    @property
+    def changed(self) -> int:
+        return sum(n for (old, new), n in self.transitions.items() if old != new)
+
+    def transition_table(self) -> "pd.DataFrame":
+        """ stored_decision x new_decision counts (stored is "Unscored" for rows without a decision) """
+        import pandas as pd
+
+        if not self.transitions:
+            return pd.DataFrame()
+        pairs = pd.Series(self.transitions)
+        pairs.index.names = ["stored_decision", "new_decision"]
+        return pairs.unstack(fill_value=0)
+
+
+def _stale_chunk(cursor, version: str, after_id: int, chunk_size: int, lock: bool) -> "pd.DataFrame":
+    import pandas as pd
+
+    cursor.execute(
+        f"SELECT {', '.join(_READ_COLUMNS)} FROM data "
+        f"WHERE id > %s AND {LIVE_ROWS_SQL} AND (scorecard_version IS NULL OR scorecard_version <> %s) "
+        f"ORDER BY id LIMIT %s{backend().for_update_sql if lock else ''}",
+        (after_id, version, chunk_size),
+    )
+    return pd.DataFrame(cursor.fetchall(), columns=_READ_COLUMNS)
+
+
+def _rescore_frame(chunk: "pd.DataFrame", card: Scorecard) -> tuple:
+    """ (inputs, scores): score_batch over the rows that have every required input; the others are dropped """
+    complete = chunk[BATCH_REQUIRED_COLUMNS].notna().all(axis=1)
+    inputs = chunk[complete].copy()
+    for col, default in BATCH_INPUT_DEFAULTS.items():
+        if default is not None:
+            inputs[col] = inputs[col].fillna(default)
+    return inputs, score_batch(inputs, card)
+
+
+def _stored_final_score(scores: "pd.DataFrame") -> "pd.Series":
+    """ final_score as stored: rounded like DECIMAL(6,2), NaN (NULL) for early rejections """
+    return scores["final_score"].round(2).where(scores["reject_reason"].isna())
+
+
+def _update_rows(ids, scores: "pd.DataFrame", version: str) -> list:
+    """ UPDATE parameters in _UPDATE_COLUMNS order plus the id """
+    final_score = _stored_final_score(scores)
+    columns = [scores[c].to_numpy(dtype=float).round(2).tolist() for c in COMPONENTS]
+    columns += [
+        scores["ratio"].to_numpy(dtype=float).round(4).tolist(),
+        final_score.astype(object).where(final_score.notna(), None).tolist(),
+        scores["decision"].tolist(),
+        scores["reject_reason"].tolist(),
+        [version] * len(scores),
+        [int(i) for i in ids],
+    ]
+    return list(zip(*columns))
+
+
+def _records(frame: "pd.DataFrame") -> list:
+    """ Row dicts with NaN turned back into None, as summary_deltas expects """
+    return frame.astype(object).where(frame.notna(), None).to_dict("records")
+
+
+@instrumented("rescore.rescore", rows=lambda report: report.rescored)
+def rescore(scorecard: Scorecard | None = None, apply: bool = False,
+            chunk_size: int = RESCORE_CHUNK_SIZE, progress=None) -> RescoreReport:
+    """
+    Rescore every stale row with `scorecard` (default: the live one).
+
+    Read-only unless `apply`; only the live scorecard can be applied, so the
+    stored scores always match what the app computes for new applicants.
+    `progress(report)` is called after each chunk.
+    """
+    card = scorecard or scoring.SCORECARD
+    if apply and card.version != scoring.SCORECARD.version:
+        raise ValueError("❌ Only the live scorecard can be applied; back-test candidates without apply")
+
+    report = RescoreReport(scorecard_version=card.version, applied=apply)
+    update_sql = (
+        f"UPDATE data SET {', '.join(f'{c} = %s' for c in _UPDATE_COLUMNS)} WHERE id = %s"
+    )
+    after_id = 0
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        while True:
+            chunk = _stale_chunk(cursor, card.version, after_id, chunk_size, lock=apply)
+            if chunk.empty:
+                conn.rollback()   # release the read snapshot
+                break
+            after_id = int(chunk["id"].iloc[-1])
+
+            inputs, scores = _rescore_frame(chunk, card)
+            report.skipped += len(chunk) - len(inputs)
+            report.rescored += len(inputs)
+            report.transitions.update(zip(inputs["decision"].fillna("Unscored"), scores["decision"]))
+
+            if apply and len(inputs):
+                cursor.executemany(update_sql, _update_rows(inputs["id"], scores, card.version))
+                old = inputs[SUMMARY_SOURCE_COLUMNS]
+                new = old.assign(
+                    decision=scores["decision"],
+                    final_score=_stored_final_score(scores),
+                )
+                _apply_summary(cursor, _records(old), sign=-1)
+                _apply_summary(cursor, _records(new))
+            conn.commit()
+            if progress:
+                progress(report)
+        cursor.close()
+    if apply:
+        invalidate_cache()
+    return report
+
+
+def stale_count(version: str | None = None) -> int:
+    """ Live rows whose scorecard_version is not `version` (default: the live scorecard's) """
+    version = version or scoring.SCORECARD.version
+    with db_connection() as conn:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT COUNT(*) FROM data WHERE {LIVE_ROWS_SQL}")
+        (total,) = cursor.fetchone()
+        cursor.execute(f"SELECT COUNT(*) FROM data WHERE scorecard_version = %s AND {LIVE_ROWS_SQL}", (version,))
+        (current,) = cursor.fetchone()
+        cursor.close()
+    return total - current
+
+
+def main(argv=None):
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Rescore stored applicants whose scorecard version is stale")
+    parser.add_argument("--scorecard", help="back-test this scorecard JSON instead of the live one")
+    parser.add_argument("--apply", action="store_true", help="write the live scorecard's results to stale rows")
+    parser.add_argument("--chunk-size", type=int, default=RESCORE_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+    if args.apply and args.scorecard:
+        parser.error("--apply only writes the live scorecard; update scorecard.json to change it")
+
+    card = load_scorecard(args.scorecard) if args.scorecard else None
+    started = time.perf_counter()
+
+    def progress(report):
+        print(f"\r{report.rescored + report.skipped:,} stale rows read", end="", flush=True)
+
+    report = rescore(card, apply=args.apply, chunk_size=args.chunk_size, progress=progress)
+    print()
+    verb = "Rescored" if report.applied else "Back-tested"
+    print(f"✅ {verb} {report.rescored:,} rows against scorecard {report.scorecard_version} "
+          f"in {time.perf_counter() - started:.1f}s; {report.changed:,} decisions change, "
+          f"{report.skipped:,} rows skipped (inputs not stored).")
+    if report.transitions:
+        print(report.transition_table().to_string())
+
+
+if __name__ == "__main__":
+    main()
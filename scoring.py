@@ -0,0 +1,491 @@
+import bisect
+import functools
+import json
+import math
+import os
+import re
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+
+if TYPE_CHECKING:
+    import pandas as pd   # imported lazily: the scalar path and the UI never need it
+
+from metrics import instrumented
+
+# -----------------------------
+# Validation Functions
+# -----------------------------
+def validate_cnic(cnic: str) -> bool:
+    return bool(re.fullmatch(r"\d{5}-?\d{7}-?\d", cnic))
+
+
+def normalize_cnic(cnic: str) -> str:
+    """ Canonical XXXXX-XXXXXXX-X form so dashed and undashed entries match """
+    digits = cnic.strip().replace("-", "")
+    if len(digits) != 13 or not digits.isdigit():
+        return cnic.strip()
+    return f"{digits[:5]}-{digits[5:12]}-{digits[12]}"
+
+
+def validate_phone(phone: str) -> bool:
+    return phone.isdigit() and len(phone) == 11
+
+
+# -----------------------------
+# Scorecard (versioned config)
+# -----------------------------
+# The brackets, point maps, weights and thresholds live in scorecard.json so
+# risk can retune them without a code change. At startup the file is
+# compiled into sorted breakpoint tables: scalar scoring looks values up with
+# `bisect`, batch scoring with `np.searchsorted`, both from the same table.
+SCORECARD_PATH = os.environ.get(
+    "SCORECARD_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "scorecard.json")
+)
+COMPONENTS = ("inc", "bal", "sal", "emp", "job", "ag", "dep", "res", "dti")
+
+
+@dataclass(frozen=True)
+class BracketTable:
+    """ Sorted breakpoints -> points. `side` is "right" for `<` rules, "left" for `<=` rules """
+    breaks: tuple
+    points: tuple
+    side: str
+    breaks_array: np.ndarray
+    points_array: np.ndarray
+
+    @classmethod
+    def compile(cls, name: str, spec: dict) -> "BracketTable":
+        breaks, points, side = list(spec["breaks"]), list(spec["points"]), spec.get("side", "right")
+        if any(a >= b for a, b in zip(breaks, breaks[1:])):
+            raise ValueError(f"Scorecard '{name}': breaks must be strictly increasing")
+        if len(points) != len(breaks) + 1:
+            raise ValueError(f"Scorecard '{name}': need exactly one more point than breaks")
+        if side not in ("left", "right"):
+            raise ValueError(f"Scorecard '{name}': side must be 'left' or 'right'")
+        return cls(tuple(breaks), tuple(points), side, np.array(breaks), np.array(points))
+
+    def lookup(self, value):
+        find = bisect.bisect_right if self.side == "right" else bisect.bisect_left
+        return self.points[find(self.breaks, value)]
+
+    def lookup_array(self, values: np.ndarray) -> np.ndarray:
+        return self.points_array[np.searchsorted(self.breaks_array, values, side=self.side)]
+
+
+@dataclass(frozen=True)
+class Scorecard:
+    version: str
+    weights: tuple          # weights in COMPONENTS order
+    approve_threshold: float
+    review_threshold: float
+    income: dict            # bike_type (or "default") -> BracketTable
+    female_multiplier: float
+    income_cap: float
+    applicant_emi_multiple: float
+    guarantor_emi_multiple: float
+    balance_points: float
+    full_months: float
+    employer_points: dict
+    job_tenure: BracketTable
+    min_age: float
+    age: BracketTable
+    zero_dependents_points: float
+    dependents: BracketTable
+    residence_points: dict
+    dti: BracketTable
+
+    @property
+    def weight_vector(self) -> np.ndarray:
+        return np.array(self.weights)
+
+    def income_table(self, bike_type) -> BracketTable:
+        return self.income.get(bike_type, self.income["default"])
+
+
+def compile_scorecard(config: dict) -> Scorecard:
+    weights = config["weights"]
+    if set(weights) != set(COMPONENTS):
+        raise ValueError(f"Scorecard weights must cover exactly: {', '.join(COMPONENTS)}")
+    income = config["income"]
+    if "default" not in income["brackets"]:
+        raise ValueError("Scorecard income brackets need a 'default' entry")
+
+    return Scorecard(
+        version=str(config["version"]),
+        weights=tuple(weights[c] for c in COMPONENTS),
+        approve_threshold=config["thresholds"]["approve"],
+        review_threshold=config["thresholds"]["review"],
+        income={
+            bike: BracketTable.compile(f"income.{bike}", spec) for bike, spec in income["brackets"].items()
+        },
+        female_multiplier=income["female_multiplier"],
+        income_cap=income["cap"],
+        applicant_emi_multiple=config["bank_balance"]["applicant_emi_multiple"],
+        guarantor_emi_multiple=config["bank_balance"]["guarantor_emi_multiple"],
+        balance_points=config["bank_balance"]["points"],
+        full_months=config["salary_consistency"]["full_months"],
+        employer_points=dict(config["employer_type"]),
+        job_tenure=BracketTable.compile("job_tenure", config["job_tenure"]),
+        min_age=config["age"]["min_age"],
+        age=BracketTable.compile("age", config["age"]),
+        zero_dependents_points=config["dependents"]["zero_points"],
+        dependents=BracketTable.compile("dependents", config["dependents"]),
+        residence_points=dict(config["residence"]),
+        dti=BracketTable.compile("dti", config["dti"]),
+    )
+
+
+def load_scorecard(path: str = SCORECARD_PATH) -> Scorecard:
+    with open(path, encoding="utf-8") as f:
+        return compile_scorecard(json.load(f))
+
+
+SCORECARD = load_scorecard()
+
+
+def reload_scorecard(path: str = SCORECARD_PATH) -> Scorecard:
+    """ Recompile the scorecard file; new calls use it immediately """
+    global SCORECARD
+    SCORECARD = load_scorecard(path)
+    score_applicant.cache_clear()
+    return SCORECARD
+
+
+# -----------------------------
+# Scoring Functions
+# -----------------------------
+def income_score(net_salary, gender, bike_type=None):
+    """
+    Salary bracket points from the scorecard. EV-1 has its own brackets;
+    every other bike type uses the default ones. Female applicants get the
+    scorecard's uplift (1.1x), capped at 100.
+    """
+    card = SCORECARD
+    base = card.income_table(bike_type).lookup(net_salary)
+
+    if gender == "F":
+        base *= card.female_multiplier
+    return min(base, card.income_cap)
+
+def bank_balance_score_custom(applicant_balance, guarantor_balance, emi):
+    """
+    Binary scoring logic:
+    - Applicant >= 3x EMI → 100
+    - Guarantor >= 6x EMI → 100
+    - If both provided:
+        → Applicant takes priority if both qualify
+    """
+    card = SCORECARD
+    score = 0
+    source = "None"
+
+    applicant_ok = applicant_balance is not None and applicant_balance >= card.applicant_emi_multiple * emi
+    guarantor_ok = guarantor_balance is not None and guarantor_balance >= card.guarantor_emi_multiple * emi
+
+    if applicant_ok and guarantor_ok:
+        score, source = card.balance_points, "Applicant (Priority)"
+    elif applicant_ok:
+        score, source = card.balance_points, "Applicant"
+    elif guarantor_ok:
+        score, source = card.balance_points, "Guarantor"
+    else:
+        score, source = 0, "None"
+
+    return score, source
+
+
+def salary_consistency_score(months):
+    return min((months / SCORECARD.full_months) * 100, 100)
+
+def employer_type_score(emp_type):
+    return SCORECARD.employer_points.get(emp_type, 0)
+
+def job_tenure_score(years):
+    return SCORECARD.job_tenure.lookup(years)
+
+def age_score(age):
+    if age < SCORECARD.min_age:
+        return -1  # reject
+    return SCORECARD.age.lookup(age)
+
+def dependents_score(dep):
+    if dep == 0:
+        return SCORECARD.zero_dependents_points
+    return SCORECARD.dependents.lookup(dep)
+
+def residence_score(res):
+    return SCORECARD.residence_points.get(res, 0)
+
+def dti_score(outstanding, emi, net_salary, tenure):
+    """
+    Debt-to-Income (DTI) Score:
+    ratio = (Outstanding / tenure + EMI) / Net Salary
+    """
+    if net_salary <= 0 or tenure <= 0:
+        return 0, 0
+
+    monthly_obligation = (outstanding / tenure) + emi
+    ratio = monthly_obligation / net_salary
+
+    return SCORECARD.dti.lookup(ratio), ratio
+
+def calculate_min_emi(bike_price, down_payment, tenure):
+    """Minimum EMI needed to cover bike price"""
+    if tenure <= 0:
+        return 0
+    return math.ceil((bike_price - down_payment) / tenure)
+
+
+# -----------------------------
+# Financing Plans
+# -----------------------------
+# bike_type -> plan name -> terms; the installment is the EMI used for scoring
+FINANCING_PLANS = {
+    "EV-1": {
+        "2 Year Plan": {"upfront": 30000, "installment": 10000, "tenure": 24},
+    },
+    "EV-125": {
+        "1 Year Plan": {"upfront": 60000, "installment": 25500, "tenure": 12},
+        "2 Year Plan": {"upfront": 40000, "installment": 14900, "tenure": 24},
+        "3 Year Plan": {"upfront": 40000, "installment": 9900, "tenure": 36},
+    },
+}
+
+
+# -----------------------------
+# Weights & Thresholds
+# -----------------------------
+def weighted_score(components: dict, scorecard: Scorecard | None = None) -> float:
+    """
+    Weighted final score from the nine component scores.
+
+    Components are summed in COMPONENTS order, starting from 0, so the
+    scalar and batch paths round identically.
+    """
+    total = 0
+    for name, weight in zip(COMPONENTS, (scorecard or SCORECARD).weights):
+        total = total + components[name] * weight
+    return total
+
+
+def decide(final_score) -> str:
+    if final_score >= SCORECARD.approve_threshold:
+        return "Approved"
+    if final_score >= SCORECARD.review_threshold:
+        return "Review"
+    return "Reject"
+
+
+# -----------------------------
+# Single-Applicant Scoring
+# -----------------------------
+SCORE_CACHE_SIZE = 4096
+
+
+@dataclass(frozen=True, slots=True)
+class ScoreResult:
+    """ Every component score plus the outcome for one applicant """
+    inc: float
+    bal: float
+    bal_source: str
+    sal: float
+    emp: float
+    job: float
+    ag: float
+    dep: float
+    res: float
+    dti: float
+    ratio: float
+    final_score: float
+    decision: str
+    reject_reason: str | None     # "No Tax Return" / "Underage" / "Insufficient Bank Balance"
+    scorecard_version: str
+
+
+@functools.lru_cache(maxsize=SCORE_CACHE_SIZE)
+def score_applicant(net_salary, gender, bike_type, applicant_bank_balance, guarantor_bank_balance,
+                    emi, tenure, outstanding, salary_consistency, employer_type, job_years,
+                    age, dependents, residence, applicant_type="Employee", tax_return="Yes") -> ScoreResult:
+    """
+    Full scoring pipeline for one applicant: nine components, early rejects,
+    weighted score and decision.
+
+    Pure and memoized on its (hashable) inputs, so a Streamlit rerun caused
+    by an unrelated field reuses the previous result instead of rescoring.
+    The final score is 0 for early rejects.
+    """
+    inc = income_score(net_salary, gender, bike_type)
+    bal, bal_source = bank_balance_score_custom(applicant_bank_balance, guarantor_bank_balance, emi)
+    sal = salary_consistency_score(salary_consistency)
+    emp = employer_type_score(employer_type)
+    job = job_tenure_score(job_years)
+    ag = age_score(age)
+    dep = dependents_score(dependents)
+    res = residence_score(residence)
+    dti, ratio = dti_score(outstanding, emi, net_salary, tenure)
+
+    final_score = 0
+    reject_reason = None
+    if applicant_type == "Businessman" and tax_return == "No":
+        decision, reject_reason = "Rejected", "No Tax Return"
+    elif ag == -1:
+        decision, reject_reason = "Reject", "Underage"
+    elif bal == 0:
+        decision, reject_reason = "Reject", "Insufficient Bank Balance"
+    else:
+        final_score = weighted_score({
+            "inc": inc, "bal": bal, "sal": sal, "emp": emp,
+            "job": job, "ag": ag, "dep": dep, "res": res,
+            "dti": dti,
+        })
+        decision = decide(final_score)
+
+    return ScoreResult(
+        inc, bal, bal_source, sal, emp, job, ag, dep, res, dti, ratio,
+        final_score, decision, reject_reason, SCORECARD.version,
+    )
+
+
+# -----------------------------
+# Batch (Vectorized) Scoring
+# -----------------------------
+BATCH_INPUT_DEFAULTS = {
+    "applicant_type": "Employee",
+    "tax_return": "Yes",
+    "guarantor_bank_balance": np.nan,
+    "outstanding": 0,
+    "bike_type": None,
+}
+BATCH_REQUIRED_COLUMNS = [
+    "net_salary", "gender", "applicant_bank_balance", "emi", "tenure",
+    "salary_consistency", "employer_type", "job_years", "age",
+    "dependents", "residence",
+]
+
+
+def _numeric(col):
+    """Float array with None/blank treated as NaN (i.e. 'not provided')."""
+    import pandas as pd
+
+    return pd.to_numeric(col, errors="coerce").to_numpy(dtype=float)
+
+
+@instrumented("scoring.score_batch", rows=len)
+def score_batch(applicants, scorecard: Scorecard | None = None) -> "pd.DataFrame":
+    """
+    Score many applicants in one vectorized pass.
+
+    `applicants` is a DataFrame (or a dict of equal-length arrays) using the
+    same field names as the Evaluation tab: net_salary, gender, bike_type,
+    applicant_bank_balance, guarantor_bank_balance, emi, tenure, outstanding,
+    salary_consistency, employer_type, job_years, age, dependents, residence,
+    applicant_type and tax_return. Optional columns fall back to
+    BATCH_INPUT_DEFAULTS.
+
+    Returns a DataFrame on the same index with every component score
+    (inc, bal, bal_source, sal, emp, job, ag, dep, res, dti, ratio),
+    final_score, decision and reject_reason — identical to calling the
+    scalar functions row by row. Pass `scorecard` to score against a
+    candidate scorecard instead of the live one (back-testing).
+    """
+    import pandas as pd
+
+    card = scorecard or SCORECARD
+    df = applicants if isinstance(applicants, pd.DataFrame) else pd.DataFrame(applicants)
+
+    missing = [c for c in BATCH_REQUIRED_COLUMNS if c not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns for batch scoring: {', '.join(missing)}")
+
+    def column(name):
+        if name in df.columns:
+            return df[name]
+        return pd.Series(BATCH_INPUT_DEFAULTS[name], index=df.index)
+
+    net_salary = _numeric(df["net_salary"])
+    emi = _numeric(df["emi"])
+    tenure = _numeric(df["tenure"])
+    outstanding = _numeric(column("outstanding"))
+    applicant_balance = _numeric(df["applicant_bank_balance"])
+    guarantor_balance = _numeric(column("guarantor_bank_balance"))
+    months = _numeric(df["salary_consistency"])
+    years = _numeric(df["job_years"])
+    age = _numeric(df["age"])
+    dep = _numeric(df["dependents"])
+
+    # --- Income (per-bike-type brackets, then female uplift capped) ---
+    bike_type = column("bike_type").to_numpy()
+    base = card.income["default"].lookup_array(net_salary).astype(float)
+    for bike, table in card.income.items():
+        if bike != "default":
+            is_bike = bike_type == bike
+            base[is_bike] = table.lookup_array(net_salary[is_bike])
+    is_female = (df["gender"] == "F").to_numpy()
+    inc = np.minimum(np.where(is_female, base * card.female_multiplier, base), card.income_cap)
+
+    # --- Bank balance (NaN >= x is False, same as a None balance) ---
+    applicant_ok = applicant_balance >= card.applicant_emi_multiple * emi
+    guarantor_ok = guarantor_balance >= card.guarantor_emi_multiple * emi
+    bal = np.where(applicant_ok | guarantor_ok, card.balance_points, 0)
+    bal_source = np.select(
+        [applicant_ok & guarantor_ok, applicant_ok, guarantor_ok],
+        ["Applicant (Priority)", "Applicant", "Guarantor"],
+        default="None",
+    )
+
+    # --- Remaining components ---
+    sal = np.minimum((months / card.full_months) * 100, 100)
+    emp = df["employer_type"].map(card.employer_points).fillna(0).to_numpy()
+    job = card.job_tenure.lookup_array(years)
+    ag = np.where(age < card.min_age, -1, card.age.lookup_array(age))
+    dep_score = np.where(dep == 0, card.zero_dependents_points, card.dependents.lookup_array(dep))
+    res = df["residence"].map(card.residence_points).fillna(0).to_numpy()
+
+    # --- Debt-to-income (0, 0 when salary or tenure is not positive) ---
+    dti_valid = (net_salary > 0) & (tenure > 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratio = ((outstanding / tenure) + emi) / net_salary
+    ratio = np.where(dti_valid, ratio, 0.0)
+    dti = np.where(dti_valid, card.dti.lookup_array(ratio), 0)
+
+    # --- Final score, accumulated in the same order as the scalar path ---
+    weighted = weighted_score({
+        "inc": inc, "bal": bal, "sal": sal, "emp": emp,
+        "job": job, "ag": ag, "dep": dep_score, "res": res,
+        "dti": dti,
+    }, card) + np.zeros(len(df))
+
+    no_tax_return = (
+        (column("applicant_type") == "Businessman") & (column("tax_return") == "No")
+    ).to_numpy()
+    early_reject = no_tax_return | (ag == -1) | (bal == 0)
+    final_score = np.where(early_reject, 0.0, weighted)
+    # object dtype keeps None for scored rows (a str column would turn it into NaN)
+    reject_reason = pd.Series(np.select(
+        [no_tax_return, ag == -1, bal == 0],
+        ["No Tax Return", "Underage", "Insufficient Bank Balance"],
+        default=None,
+    ), index=df.index, dtype=object)
+
+    decision = np.select(
+        [
+            no_tax_return,
+            early_reject,
+            final_score >= card.approve_threshold,
+            final_score >= card.review_threshold,
+        ],
+        ["Rejected", "Reject", "Approved", "Review"],
+        default="Reject",
+    )
+
+    return pd.DataFrame(
+        {
+            "inc": inc, "bal": bal, "bal_source": bal_source,
+            "sal": sal, "emp": emp, "job": job, "ag": ag,
+            "dep": dep_score, "res": res, "dti": dti, "ratio": ratio,
+            "final_score": final_score, "decision": decision, "reject_reason": reject_reason,
+        },
+        index=df.index,
+    )
@@ -1,310 +1,151 @@
 import streamlit as st
 import re
+import time
 import urllib.parse
-import mysql.connector
-import pandas as pd
-from io import BytesIO
-
-
-# -----------------------------
-# Database Connection
-# -----------------------------
-def get_db_connection():
-    return mysql.connector.connect(
-        host="3.17.21.91",
-        user="ahsan",
-        password="ahsan@321",
-        database="ev_installment_project"
-    )
-def save_to_db(data: dict):
-    conn = get_db_connection()
-    cursor = conn.cursor()
-
-    # --- Check if CNIC already exists ---
-    cursor.execute("SELECT COUNT(*) FROM data WHERE cnic = %s", (data["cnic"],))
-    (exists,) = cursor.fetchone()
-    if exists > 0:
-        cursor.close()
-        conn.close()
-        raise ValueError("❌ CNIC already exists in the database. Please enter a unique CNIC.")
-
-    # Columns in the exact order we will pass values
-    columns = [
-        "applicant_type", "name", "cnic", "license_no",
-        "phone_number", "gender",
-        "guarantors", "female_guarantor", "electricity_bill", "pdc_option",  
-        "education", "occupation", "designation",
-        "employer_name", "employer_contact",
-        "address", "city", "state_province", "postal_code", "country",
-        "net_salary", "applicant_bank_balance", "guarantor_bank_balance",
-        "employer_type", "age", "residence",
-        "bike_type", "bike_price", "down_payment", "tenure", "emi",
-        "outstanding",
-        "decision"
-    ]
-
-    full_name = f"{data['first_name']} {data['last_name']}".strip()
-    full_address = f"{data['street_address']}, {data['area_address']}"
-
-    # Values in the same order as `columns`
-    values = (
-        data["applicant_type"],
-        full_name, data["cnic"], data["license_no"],
-        data["phone_number"], data["gender"],
-        data["guarantors"], data["female_guarantor"], data["electricity_bill"], data["pdc_option"],
-        data.get("education"), data.get("occupation"), data.get("designation"),
-        data.get("employer_name"), data.get("employer_contact"),
-        full_address, data["city"], data["state_province"], data["postal_code"], data["country"],
-        data["net_salary"], data["applicant_bank_balance"], data.get("guarantor_bank_balance"),
-        data["employer_type"], data["age"], data["residence"],
-        data["bike_type"], data["bike_price"], data["down_payment"], data["tenure"], data["emi"], data["outstanding"],
-        data["decision"]
-    )
 
+from db import (
+    delete_applicant, delete_applicants, restore_applicants, move_decisions, count_selected, invalidate_cache,
+    DELETE_UNDO_SECONDS, start_purger,
+    count_applicants, fetch_applicants_page, PAGE_SIZE, portfolio_aggregates,
+    search_applicants, fetch_applicant, SEARCH_LIMIT,
+    read_applicant_file, bulk_import_applicants, score_fields,
+)
+from cashflow import fetch_loans, collections_by_month, export_schedule_csv
+from export import EXPORT_FORMATS
+from journal import enqueue_save, journal_stats, failed_saves, retry_failed, discard_failed, start_writer
+from metrics import (
+    METRICS_ADMIN_TOKEN, timed, instrumented, observe, snapshot, gauges, render_prometheus, write_metrics_file,
+)
+import scoring
+from scoring import validate_cnic, validate_phone, normalize_cnic, score_applicant, FINANCING_PLANS
+from sensitivity import sensitivity_sweep, PROFILE_DEFAULTS, MAX_GRID_POINTS
+from styles import APP_CSS, LANDING_CSS
 
-    # Build placeholders dynamically so counts always match
-    placeholders = ", ".join(["%s"] * len(values))
-    cols_sql = ", ".join(columns)
-    query = f"INSERT INTO data ({cols_sql}) VALUES ({placeholders})"
-
-    cursor.execute(query, values)
-    conn.commit()
-    cursor.close()
-    conn.close()
-
-
-def fetch_all_applicants():
-    conn = get_db_connection()
-    query = """
-    SELECT 
-        id, 
-        applicant_type,
-        name, 
-        cnic, 
-        license_no,
-        phone_number, 
-        gender,
-        guarantors, 
-        female_guarantor, 
-        electricity_bill,
-        pdc_option,
-        education, 
-        occupation, 
-        designation,
-        employer_name,
-        employer_contact,
-        address, 
-        city, 
-        state_province, 
-        postal_code, 
-        country,
-        net_salary, 
-        applicant_bank_balance, 
-        guarantor_bank_balance,
-        employer_type, 
-        age, 
-        residence,
-        bike_type, 
-        bike_price, 
-        down_payment,
-        tenure,
-        emi, 
-        outstanding,
-        decision
-    FROM data
-    ORDER BY id ASC;
-    """
-    df = pd.read_sql(query, conn)
-    conn.close()
-    return df
-
-
-def resequence_ids():
-    """ Re-sequence IDs after deletion and reset AUTO_INCREMENT """
-    try:
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        cursor.execute("SET @count = 0;")
-        cursor.execute("UPDATE data SET id = (@count := @count + 1)")
-        cursor.execute("ALTER TABLE data AUTO_INCREMENT = 1")
-        conn.commit()
-        cursor.close()
-        conn.close()
-        st.success("✅ IDs resequenced successfully!")
-    except Exception as e:
-        st.error(f"❌ Failed to resequence IDs: {e}")
+DECISION_DISPLAY = {"Approved": "✅ Approve", "Review": "🟡 Review", "Reject": "❌ Reject"}
+BULK_MOVES = {"✅ Move Review → Approved": "Approved", "❌ Move Review → Reject": "Reject"}
 
-import math
-import re
 
-# -----------------------------
-# Validation Functions
-# -----------------------------
-def validate_cnic(cnic: str) -> bool:
-    return bool(re.fullmatch(r"\d{5}-?\d{7}-?\d", cnic))
+def decision_label(result):
+    if result.reject_reason == "No Tax Return":
+        return "❌ Rejected (No Tax Return)"
+    if result.reject_reason:
+        return f"❌ Reject ({result.reject_reason})"
+    return DECISION_DISPLAY[result.decision]
 
 
-def validate_phone(phone: str) -> bool:
-    return phone.isdigit() and len(phone) == 11
+def show_detailed_scores(result, emi, heading=True):
+    if heading:
+        st.markdown("### 🔹 Detailed Scores")
+    st.write(f"Income Score: {result.inc:.1f}")
+    st.write(f"Bank Balance Score ({result.bal_source}): {result.bal:.1f}")
+    st.write(f"Salary Consistency: {result.sal:.1f}")
+    st.write(f"Employer Type Score: {result.emp:.1f}")
+    st.write(f"Job Tenure Score: {result.job:.1f}")
+    st.write(f"Age Score: {result.ag:.1f}")
+    st.write(f"Dependents Score: {result.dep:.1f}")
+    st.write(f"Residence Score: {result.res:.1f}")
+    st.write(f"Debt-to-Income Ratio: {result.ratio:.2f}")
+    st.write(f"Debt-to-Income Score: {result.dti:.1f}")
+    st.write(f"EMI used for scoring: {emi}")
 
-# -----------------------------
-# Scoring Functions
-# -----------------------------
-def income_score(net_salary, gender, bike_type=None):
-    """
-    If bike_type == 'EV-1', use the special bracket:
-        <35,000  -> 0
-        <50,000  -> 30
-        <70,000  -> 40
-        <90,000  -> 50
-        <110,000 -> 60
-        <130,000 -> 80
-        else     -> 100
-
-    Otherwise, keep your original brackets.
-    """
-    if bike_type == "EV-1":
-        if net_salary < 35000:
-            base = 0
-        elif net_salary < 50000:
-            base = 30
-        elif net_salary < 70000:
-            base = 40
-        elif net_salary < 90000:
-            base = 50
-        elif net_salary < 110000:
-            base = 60
-        elif net_salary < 130000:
-            base = 80
-        else:
-            base = 100
-    else:
-        if net_salary < 50000:
-            base = 0
-        elif net_salary < 70000:
-            base = 30
-        elif net_salary < 90000:
-            base = 40
-        elif net_salary < 100000:
-            base = 50
-        elif net_salary < 120000:
-            base = 60
-        elif net_salary < 150000:
-            base = 80
-        else:
-            base = 100
-
-    if gender == "F":
-        base *= 1.1
-    return min(base, 100)
-    
-def bank_balance_score_custom(applicant_balance, guarantor_balance, emi):
-    """
-    Binary scoring logic:
-    - Applicant >= 3x EMI → 100
-    - Guarantor >= 6x EMI → 100
-    - If both provided:
-        → Applicant takes priority if both qualify
-    """
-    score = 0
-    source = "None"
-
-    applicant_ok = applicant_balance is not None and applicant_balance >= 3 * emi
-    guarantor_ok = guarantor_balance is not None and guarantor_balance >= 6 * emi
-
-    if applicant_ok and guarantor_ok:
-        score, source = 100, "Applicant (Priority)"
-    elif applicant_ok:
-        score, source = 100, "Applicant"
-    elif guarantor_ok:
-        score, source = 100, "Guarantor"
-    else:
-        score, source = 0, "None"
 
-    return score, source
+# ✅ Smooth, lag-free number input (shows formatted value below)
+def formatted_number_input(label, key, optional=False):
+    # Basic input (no commas while typing); the widget key keeps the raw text
+    input_val = st.text_input(label, key=f"{key}_raw")
 
+    # Keep only digits
+    clean_val = re.sub(r"[^\d]", "", input_val)
 
-def salary_consistency_score(months):
-    return min((months / 6) * 100, 100)
+    # Convert to number
+    num = int(clean_val) if clean_val else (0 if not optional else None)
 
-def employer_type_score(emp_type):
-    mapping = {"Govt": 100, "MNC": 80, "Private Limited": 70, "SME": 60, "Startup": 40, "Self-employed": 20}
-    return mapping.get(emp_type, 0)
+    # Display formatted version below
+    if clean_val:
+        st.caption(f"💰 **Formatted:** {num:,}")
 
-def job_tenure_score(years):
-    if years >= 10:
-        return 100
-    elif years >= 5:
-        return 70
-    elif years >= 3:
-        return 50
-    elif years >= 1:
-        return 20
-    else:
-        return 0
-
-def age_score(age):
-    if age < 18:
-        return -1  # reject
-    elif age <= 25:
-        return 80
-    elif age <= 30:
-        return 100
-    elif age <= 40:
-        return 60
-    else:
-        return 30
-
-def dependents_score(dep):
-    if dep == 0:
-        return 100
-    elif dep <= 2:
-        return 80
-    elif dep <= 4:
-        return 60
-    else:
-        return 40
-
-def residence_score(res):
-    mapping = {"Owned": 100, "Family": 80, "Rented": 60, "Temporary": 40}
-    return mapping.get(res, 0)
-
-def dti_score(outstanding, emi, net_salary, tenure):
-    """
-    Debt-to-Income (DTI) Score:
-    ratio = (Outstanding / tenure + EMI) / Net Salary
-    """
-    if net_salary <= 0 or tenure <= 0:
-        return 0, 0
-
-    monthly_obligation = (outstanding / tenure) + emi
-    ratio = monthly_obligation / net_salary
-
-    if ratio <= 0.1:
-        score = 100
-    elif ratio <= 0.2:
-        score = 80
-    elif ratio <= 0.3:
-        score = 60
-    elif ratio <= 0.5:
-        score = 40
-    else:
-        score = 20
+    return num
 
-    return score, ratio
 
-def calculate_min_emi(bike_price, down_payment, tenure):
-    """Minimum EMI needed to cover bike price"""
-    if tenure <= 0:
-        return 0
-    return math.ceil((bike_price - down_payment) / tenure)
+def remember_deleted(ids):
+    """ Offer Undo for this session's latest delete (see show_undo_delete) """
+    st.session_state.last_deleted = {"ids": list(ids), "at": time.time()}
 
 
+def undo_delete():
+    """ Undo button callback: it runs before the rerun renders, so the table already shows the restored rows """
+    deleted = st.session_state.last_deleted
+    st.session_state.last_deleted = None
+    try:
+        restored = restore_applicants(deleted["ids"])
+        messages = [("success", f"✅ {restored:,} applicant(s) restored.")]
+        if restored < len(deleted["ids"]):
+            messages.append(("warning", f"⚠️ {len(deleted['ids']) - restored:,} applicant(s) not restored: "
+                                        "their CNIC has been saved again, or they were already purged."))
+    except Exception as e:
+        messages = [("error", f"❌ Failed to restore: {e}")]
+    st.session_state.undo_messages = messages
+
+
+def show_undo_delete():
+    """ Undo button for this session's latest delete, shown for DELETE_UNDO_SECONDS """
+    for kind, message in st.session_state.pop("undo_messages", []):
+        getattr(st, kind)(message)
+    deleted = st.session_state.get("last_deleted")
+    if not deleted:
+        return
+    remaining = DELETE_UNDO_SECONDS - (time.time() - deleted["at"])
+    if remaining <= 0:
+        st.session_state.last_deleted = None
+        return
+    col1, col2 = st.columns([4, 1])
+    col1.info(f"🗑️ {len(deleted['ids']):,} applicant(s) deleted. Undo is available for {remaining:.0f} more seconds.")
+    col2.button("↩️ Undo", key="undo_delete", on_click=undo_delete)
+
+
+def show_save_queue(key):
+    """ Pending / failed write-behind saves, with retry and discard for the failed ones """
+    stats = journal_stats()
+    if stats["pending"]:
+        message = f"🕒 {stats['pending']:,} saved applicant(s) waiting to be written to the database."
+        if stats["last_error"]:
+            message += f" Retrying — last error: {stats['last_error']}"
+        st.info(message)
+    if stats["failed"]:
+        with st.expander(f"⚠️ {stats['failed']:,} save(s) rejected by the database"):
+            for entry in failed_saves():
+                col1, col2, col3 = st.columns([4, 1, 1])
+                col1.write(f"**{entry['name'] or '—'}** · {entry['cnic']}  \n{entry['error']}")
+                col2.button("🔁 Retry", key=f"{key}_retry_{entry['id']}", on_click=retry_failed, args=(entry["id"],))
+                col3.button("🗑️ Discard", key=f"{key}_discard_{entry['id']}", on_click=discard_failed, args=(entry["id"],))
+
+
+def show_metrics_panel():
+    """ Admin-only latency/row/error view; opened with ?admin=<METRICS_ADMIN_TOKEN> """
+    with st.sidebar:
+        st.subheader("⏱️ Metrics")
+        st.caption("Since this server process started, across all sessions.")
+        st.dataframe(
+            [{"op": op, **{k: round(v, 1) if isinstance(v, float) else v for k, v in m.items()}}
+             for op, m in snapshot().items()],
+            hide_index=True, use_container_width=True
+        )
+        with st.expander("DB pool & cache"):
+            st.json(gauges())
+        st.download_button(
+            label="📥 Prometheus metrics",
+            data=render_prometheus,
+            file_name="metrics.prom",
+            mime="text/plain",
+            on_click="ignore"
+        )
 
-import streamlit as st
 
 # --- PAGE CONFIG ---
 st.set_page_config(page_title="EV Bike Finance Portal", layout="centered")
+rerun_started = time.perf_counter()
+start_writer()
+start_purger()
 
 # --- SESSION STATE INIT ---
 if 'app_started' not in st.session_state:
@@ -313,54 +154,7 @@ if 'app_started' not in st.session_state:
 # --- LANDING PAGE ---
 if not st.session_state['app_started']:
     # Custom styling (gradient background + blue button)
-    page_bg = """
-    <style>
-    [data-testid="stAppViewContainer"] {
-        background: linear-gradient(135deg, #001F3F 0%, #0074D9 50%, #7FDBFF 100%);
-        color: white;
-        padding-top: 6rem;
-    }
-    [data-testid="stHeader"] {background: rgba(0,0,0,0);}
-    .title {
-        font-size: 2.8rem;
-        font-weight: 800;
-        margin-bottom: 1rem;
-        text-align: center;
-        background: linear-gradient(to right, #7FDBFF, #39CCCC, #01FF70);
-        -webkit-background-clip: text;
-        -webkit-text-fill-color: transparent;
-    }
-    .subtitle {
-        font-size: 1.1rem;
-        color: #E0E0E0;
-        text-align: center;
-        margin-bottom: 2.5rem;
-    }
-    .divider {
-        border: none;
-        height: 1px;
-        background-color: rgba(255, 255, 255, 0.3);
-        margin: 2rem 0;
-    }
-    /* --- Custom blue button --- */
-    div.stButton > button:first-child {
-        background-color: #0074D9;
-        color: white;
-        border: none;
-        padding: 0.75rem 1.5rem;
-        border-radius: 10px;
-        font-size: 1.1rem;
-        font-weight: 600;
-        transition: 0.3s ease-in-out;
-    }
-    div.stButton > button:first-child:hover {
-        background-color: #005fa3;
-        transform: translateY(-2px);
-        box-shadow: 0 4px 10px rgba(0,0,0,0.3);
-    }
-    </style>
-    """
-    st.markdown(page_bg, unsafe_allow_html=True)
+    st.markdown(LANDING_CSS, unsafe_allow_html=True)
 
     # Main content block
     st.markdown('<h1 class="title">⚡ EV Bike Finance Portal</h1>', unsafe_allow_html=True)
@@ -377,66 +171,8 @@ if not st.session_state['app_started']:
         st.rerun()
 
     st.stop()
-st.markdown(
-    """
-    <style>
-    /* 🔵 Global Blue Gradient Background */
-    [data-testid="stAppViewContainer"] {
-        background: linear-gradient(to bottom right, #004aad, #5de0e6);
-        background-attachment: fixed;
-    }
-
-    /* 📄 Solid White Form Container */
-    .block-container {
-        background-color: #ffffff;  /* Fully opaque white */
-        padding: 2rem 3rem;
-        border-radius: 20px;
-        box-shadow: 0px 3px 10px rgba(0,0,0,0.2);
-        margin-top: 2rem;
-        margin-bottom: 2rem;
-    }
-
-    /* 🌈 Headings on Blue Background (Landing Page Titles) */
-    h1, h2, h3, h4 {
-        color: #ffffff;
-        font-weight: 700;
-    }
-
-    /* 🧾 Form and Body Text (on white areas) */
-    .stTextInput label,
-    .stSelectbox label,
-    .stNumberInput label,
-    .stRadio label,
-    .stCheckbox label,
-    p, span, div, label {
-        color: #002b80 !important;  /* Dark blue text for readability */
-    }
-
-    /* 💾 Primary Buttons */
-    button[kind="primary"] {
-        background-color: #004aad !important;
-        color: white !important;
-        font-weight: 600 !important;
-        border-radius: 10px !important;
-        border: none !important;
-    }
-
-    button[kind="primary"]:hover {
-        background-color: #0059d6 !important;
-        color: white !important;
-    }
-
-    /* 🎯 Input Styling */
-    .stTextInput > div > div > input,
-    .stNumberInput input,
-    .stSelectbox select {
-        border-radius: 10px !important;
-        border: 1px solid #004aad !important;
-    }
-    </style>
-    """,
-    unsafe_allow_html=True
-)
+with timed("ui.css"):
+    st.markdown(APP_CSS, unsafe_allow_html=True)
 
 
 # -----------------------------
@@ -444,12 +180,36 @@ st.markdown(
 # -----------------------------
 st.title("⚡ Electric Bike Finance Portal")
 
-tabs = st.tabs(["📋 Applicant Information", "📊 Evaluation", "🎯 Results", "📂 Applicants", "👾 Agent"])
+# Switching tabs reruns the script, and only the open tab's body executes below, so
+# typing in the form never queries the DB or rescores. The two form tabs always
+# render: Results and Save read their widget values, which Streamlit would drop
+# if the widgets were skipped for a run.
+# The gated tabs' inputs would be dropped the same way, so while a tab is closed
+# its widget keys are assigned to themselves: that turns them into app state,
+# which Streamlit keeps and hands back to the widgets when the tab is reopened.
+KEPT_WIDGET_PREFIXES = {
+    "📂 Applicants": ("applicant_search", "f_", "export_format"),
+    "👾 Agent": ("agent_",),
+    "📈 Portfolio": ("portfolio_",),
+    "🧪 What-if": ("whatif_",),
+}
+for tab_label, prefixes in KEPT_WIDGET_PREFIXES.items():
+    if st.session_state.get("active_tab") == tab_label:
+        continue
+    for widget_key in list(st.session_state):
+        if widget_key.startswith(prefixes) and not widget_key.endswith("_btn"):
+            st.session_state[widget_key] = st.session_state[widget_key]
+
+tabs = st.tabs(
+    ["📋 Applicant Information", "📊 Evaluation", "🎯 Results", "📂 Applicants", "👾 Agent", "📈 Portfolio", "🧪 What-if"],
+    key="active_tab",
+    on_change="rerun"
+)
 
 # -----------------------------
 # Page 1: Applicant Info
 # -----------------------------
-with tabs[0]:
+with tabs[0], timed("ui.tab.applicant_info"):
     st.subheader("Applicant Information")
 
     applicant_type = st.selectbox(
@@ -469,7 +229,7 @@ with tabs[0]:
         "Enter last 3 digits for License Number (#XXX)",
         min_value=0, max_value=999, step=1, format="%03d"
     )
-    license_number = f"{cnic}#{license_suffix}" if validate_cnic(cnic) else ""
+    license_number = f"{normalize_cnic(cnic)}#{license_suffix}" if validate_cnic(cnic) else ""
 
     phone_number = st.text_input("Phone Number (11 digits only)")
     if phone_number and not validate_phone(phone_number):
@@ -554,279 +314,247 @@ with tabs[0]:
 # -------------------
 # EVALUATION 
 # -------------------
-with tabs[1]:
-    if not st.session_state.get("applicant_valid", False):
-        st.error("🚫 Please complete Applicant Information first.")
+# Evaluation inputs and the score preview live in a fragment: editing a field
+# reruns only this function, not the CSS, the Applicant Information checks or
+# the other tabs. On full reruns it returns the inputs for Results and Save.
+@st.fragment
+@instrumented("ui.fragment.evaluation")
+def evaluation_inputs(gender):
+    st.subheader("Evaluation Inputs")
+
+    # Get applicant type from previous tab (default to employee if not set)
+    applicant_type = st.session_state.get("applicant_type", "Employee")
+
+    # Dynamic labels based on applicant type
+    if applicant_type == "Businessman":
+        salary_label = "Net Profit (PKR)"
+        consistency_label = "Months with Revenue Generated (0–6)"
+        tenure_label = "Business Years"
+
+        # 🔹 Show Evidence of Tax Return question
+        tax_return = st.radio("Evidence of Tax Return?", ["Yes", "No"], key="tax_return")
     else:
-        st.subheader("Evaluation Inputs")
-
-        # Get applicant type from previous tab (default to employee if not set)
-        applicant_type = st.session_state.get("applicant_type", "Employee")
-
-        # Dynamic labels based on applicant type
-        if applicant_type == "Businessman":
-            salary_label = "Net Profit (PKR)"
-            consistency_label = "Months with Revenue Generated (0–6)"
-            tenure_label = "Business Years"
-
-            # 🔹 Show Evidence of Tax Return question
-            tax_return = st.radio("Evidence of Tax Return?", ["Yes", "No"], key="tax_return")
-        else:
-            salary_label = "Net Salary (PKR)"
-            consistency_label = "Months with Salary Credit (0–6)"
-            tenure_label = "Job Tenure (Years)"
-
-        # ✅ Smooth, lag-free number input (shows formatted value below)
-        def formatted_number_input(label, key, optional=False):
-            raw_key = f"{key}_raw"
-            raw_val = st.session_state.get(raw_key, "")
-
-            # Basic input (no commas while typing)
-            input_val = st.text_input(label, value=raw_val, key=raw_key)
-
-            # Keep only digits
-            clean_val = re.sub(r"[^\d]", "", input_val)
-
-            # Convert to number
-            num = int(clean_val) if clean_val else (0 if not optional else None)
-
-            # Display formatted version below
-            if clean_val:
-                st.caption(f"💰 **Formatted:** {num:,}")
-
-            return num
+        salary_label = "Net Salary (PKR)"
+        consistency_label = "Months with Salary Credit (0–6)"
+        tenure_label = "Job Tenure (Years)"
+
+    # 💰 Financial Inputs
+    net_salary = formatted_number_input(salary_label, key="net_salary")
+    applicant_bank_balance = formatted_number_input(
+        "Applicant's Average 6M Bank Balance (PKR)", key="applicant_bank_balance"
+    )
+    guarantor_bank_balance = formatted_number_input(
+        "Guarantor's Average 6M Bank Balance (Optional, PKR)", key="guarantor_bank_balance", optional=True
+    )
 
-        # 💰 Financial Inputs
-        net_salary = formatted_number_input(salary_label, key="net_salary")
-        applicant_bank_balance = formatted_number_input(
-            "Applicant's Average 6M Bank Balance (PKR)", key="applicant_bank_balance"
-        )
-        guarantor_bank_balance = formatted_number_input(
-            "Guarantor's Average 6M Bank Balance (Optional, PKR)", key="guarantor_bank_balance", optional=True
+    # 📅 Other Inputs
+    salary_consistency = st.number_input(consistency_label, min_value=0, max_value=6, step=1)
+    employer_type = st.selectbox("Employer Type", ["Govt", "MNC", "Private Limited", "SME", "Startup", "Self-employed"])
+    age = st.number_input("Age", min_value=18, max_value=70, step=1)
+    job_years = st.number_input(tenure_label, min_value=0, step=1)
+    if job_years > age:
+        st.error("❌ Job tenure cannot exceed age. Please correct the values.")
+    dependents = st.number_input("Number of Dependents", min_value=0, step=1)
+    residence = st.radio("Residence", ["Owned", "Family", "Rented", "Temporary"])
+
+    # 🚲 Bike Type
+    bike_type = st.selectbox("Bike Type", ["EV-1", "EV-125"])
+
+    # 🏦 Financing Plan Dropdown (Dynamic)
+    # 🔁 CHANGED: plans now depend on bike_type (EV-1 has only one 2-Year plan)
+    financing_plans = FINANCING_PLANS[bike_type]
+
+    selected_plan = st.selectbox("Financing Plan", list(financing_plans.keys()))
+
+    # ✅ Calculate plan values
+    plan = financing_plans[selected_plan]
+    bike_price = plan["upfront"] + plan["installment"] * plan["tenure"]
+    emi = plan["installment"]
+    tenure = plan["tenure"]
+    down_payment = plan["upfront"]
+
+    # 🏦 Display Plan Details (read-only)
+    with st.container():
+        st.markdown("💳 Financing Plan Details")
+        col1, col2 = st.columns(2)
+        with col1:
+            st.metric("Down Payment / Upfront", f"Rs. {down_payment:,}")
+            st.metric("Installment Amount", f"Rs. {emi:,}")
+        with col2:
+            st.metric("Tenure (Months)", f"{tenure}")
+            st.metric("Total Bike Price", f"Rs. {bike_price:,}")
+
+    # 🚫 Outstanding Obligation input remains editable
+    outstanding = st.number_input("Outstanding Obligation", min_value=0, step=1000)
+
+    # 💡 Minimum EMI info
+    st.info(f"💡 EMI to be used for scoring: {emi:,}")
+
+    # ⚡ Live preview (memoized scoring, full breakdown on the Results tab)
+    if net_salary > 0:
+        preview = score_applicant(
+            net_salary, gender, bike_type, applicant_bank_balance, guarantor_bank_balance,
+            emi, tenure, outstanding, salary_consistency, employer_type, job_years,
+            age, dependents, residence, applicant_type, st.session_state.get("tax_return", "Yes"),
         )
+        p_col1, p_col2 = st.columns(2)
+        p_col1.metric("Score Preview", "N/A" if preview.reject_reason else f"{preview.final_score:.1f}")
+        p_col2.metric("Decision Preview", decision_label(preview))
 
-        # 📅 Other Inputs
-        salary_consistency = st.number_input(consistency_label, min_value=0, max_value=6, step=1)
-        employer_type = st.selectbox("Employer Type", ["Govt", "MNC", "Private Limited", "SME", "Startup", "Self-employed"])
-        age = st.number_input("Age", min_value=18, max_value=70, step=1)
-        job_years = st.number_input(tenure_label, min_value=0, step=1)
-        if job_years > age:
-            st.error("❌ Job tenure cannot exceed age. Please correct the values.")
-        dependents = st.number_input("Number of Dependents", min_value=0, step=1)
-        residence = st.radio("Residence", ["Owned", "Family", "Rented", "Temporary"])
-
-        # 🚲 Bike Type
-        bike_type = st.selectbox("Bike Type", ["EV-1", "EV-125"])
-
-        # 🏦 Financing Plan Dropdown (Dynamic)
-        # 🔁 CHANGED: plans now depend on bike_type
-        if bike_type == "EV-1":
-            # EV-1 has only one 2-Year plan
-            financing_plans = {
-                "2 Year Plan": {"upfront": 30000, "installment": 10000, "tenure": 24},
-            }
-        else:
-            # EV-125 keeps the original three plans
-            financing_plans = {
-                "1 Year Plan": {"upfront": 60000, "installment": 25500, "tenure": 12},
-                "2 Year Plan": {"upfront": 40000, "installment": 14900, "tenure": 24},
-                "3 Year Plan": {"upfront": 40000, "installment": 9900, "tenure": 36},
-            }
-
-        selected_plan = st.selectbox("Financing Plan", list(financing_plans.keys()))
-
-        # ✅ Calculate plan values
-        plan = financing_plans[selected_plan]
-        bike_price = plan["upfront"] + plan["installment"] * plan["tenure"]
-        emi = plan["installment"]
-        tenure = plan["tenure"]
-        down_payment = plan["upfront"]
-
-        # 🏦 Display Plan Details (read-only)
-        with st.container():
-            st.markdown("💳 Financing Plan Details")
-            col1, col2 = st.columns(2)
-            with col1:
-                st.metric("Down Payment / Upfront", f"Rs. {down_payment:,}")
-                st.metric("Installment Amount", f"Rs. {emi:,}")
-            with col2:
-                st.metric("Tenure (Months)", f"{tenure}")
-                st.metric("Total Bike Price", f"Rs. {bike_price:,}")
-
-        # 🚫 Outstanding Obligation input remains editable
-        outstanding = st.number_input("Outstanding Obligation", min_value=0, step=1000)
-
-        # 💡 Minimum EMI info
-        st.info(f"💡 EMI to be used for scoring: {emi:,}")
-
+    return (
+        net_salary, applicant_bank_balance, guarantor_bank_balance, salary_consistency, employer_type,
+        age, job_years, dependents, residence, bike_type, bike_price, down_payment, tenure, emi, outstanding
+    )
 
 
-# -------------------
-# RESULTS (Reactive)
-# -------------------
-with tabs[2]:
+with tabs[1], timed("ui.tab.evaluation"):
     if not st.session_state.get("applicant_valid", False):
         st.error("🚫 Please complete Applicant Information first.")
     else:
-        st.subheader("🎯 Results Summary")
-
-        if net_salary > 0 and tenure > 0:
-            # --- Calculate Scores ---
-            inc = income_score(net_salary, gender, bike_type)
-            bal, bal_source = bank_balance_score_custom(applicant_bank_balance, guarantor_bank_balance, emi)
-            sal = salary_consistency_score(salary_consistency)
-            emp = employer_type_score(employer_type)
-            job = job_tenure_score(job_years)
-            ag = age_score(age)
-            dep = dependents_score(dependents)
-            res = residence_score(residence)
-            dti, ratio = dti_score(outstanding, emi, net_salary, tenure)
-
-            # --- Final Decision ---
-            final_score = 0  # ✅ Prevent NameError if rejected early
-
-            applicant_type = st.session_state.get("applicant_type", "")
-            tax_return = st.session_state.get("tax_return", "Yes")
-
-            if applicant_type == "Businessman" and tax_return == "No":
-                decision = "Rejected"
-                decision_display = "❌ Rejected (No Tax Return)"
-                st.error("❌ Rejected: No evidence of tax return provided.")
-            elif ag == -1:
-                decision = "Reject"
-                decision_display = "❌ Reject (Underage)"
-            elif bal == 0:
-                decision = "Reject"
-                decision_display = "❌ Reject (Insufficient Bank Balance)"
-            else:
-                final_score = (
-                    inc * 0.40 + bal * 0.30 + sal * 0.04 + emp * 0.04 +
-                    job * 0.04 + ag * 0.04 + dep * 0.04 + res * 0.05 +
-                    dti * 0.05
-                )
-                if final_score >= 75:
-                    decision = "Approved"
-                    decision_display = "✅ Approve"
-                elif final_score >= 60:
-                    decision = "Review"
-                    decision_display = "🟡 Review"
-                else:
-                    decision = "Reject"
-                    decision_display = "❌ Reject"
-
-            # --- Display Scores ---
-            st.markdown("### 🔹 Detailed Scores")
-            st.write(f"Income Score: {inc:.1f}")
-            st.write(f"Bank Balance Score ({bal_source}): {bal:.1f}")
-            st.write(f"Salary Consistency: {sal:.1f}")
-            st.write(f"Employer Type Score: {emp:.1f}")
-            st.write(f"Job Tenure Score: {job:.1f}")
-            st.write(f"Age Score: {ag:.1f}")
-            st.write(f"Dependents Score: {dep:.1f}")
-            st.write(f"Residence Score: {res:.1f}")
-            st.write(f"Debt-to-Income Ratio: {ratio:.2f}")
-            st.write(f"Debt-to-Income Score: {dti:.1f}")
-            st.write(f"EMI used for scoring: {emi}")
-
-            # ✅ Show N/A for Final Score if rejected early
-            if decision == "Reject" and final_score == 0:
-                st.write("Final Score: N/A")
-            else:
-                st.write(f"Final Score: {final_score:.1f}")
+        (net_salary, applicant_bank_balance, guarantor_bank_balance, salary_consistency, employer_type,
+         age, job_years, dependents, residence, bike_type, bike_price, down_payment, tenure, emi,
+         outstanding) = evaluation_inputs(gender)
 
-            st.subheader(f"🏆 Decision: {decision_display}")
 
-            # -------------------------------
-            # ⚠️ Bank Balance Rejection Message
-            # -------------------------------
-            if bal == 0:
-                messages = []
 
-                # Applicant condition
-                if applicant_bank_balance is not None and applicant_bank_balance < 3 * emi:
-                    messages.append(
-                        f"Applicant bank balance Rs. {applicant_bank_balance:,.0f} "
-                        f"< required bank balance Rs. {3 * emi:,.0f} (3×EMI)"
-                    )
-
-                # Guarantor condition
-                if guarantor_bank_balance is not None and guarantor_bank_balance < 6 * emi:
-                    messages.append(
-                        f" Guarantor bank balance Rs. {guarantor_bank_balance:,.0f} "
-                        f"< required guarantor bank balance Rs. {6 * emi:,.0f} (6×EMI)"
+# -------------------
+# RESULTS (Reactive)
+# -------------------
+if tabs[2].open:
+    with tabs[2], timed("ui.tab.results"):
+        if not st.session_state.get("applicant_valid", False):
+            st.error("🚫 Please complete Applicant Information first.")
+        else:
+            st.subheader("🎯 Results Summary")
+
+            if net_salary > 0 and tenure > 0:
+                # --- Calculate Scores (memoized: edits to unrelated fields don't rescore) ---
+                applicant_type = st.session_state.get("applicant_type", "")
+                tax_return = st.session_state.get("tax_return", "Yes")
+
+                with timed("scoring.score_applicant"):
+                    result = score_applicant(
+                        net_salary, gender, bike_type, applicant_bank_balance, guarantor_bank_balance,
+                        emi, tenure, outstanding, salary_consistency, employer_type, job_years,
+                        age, dependents, residence, applicant_type, tax_return,
                     )
+                final_score = result.final_score
+                decision = result.decision
+                decision_display = decision_label(result)
+                if result.reject_reason == "No Tax Return":
+                    st.error("❌ Rejected: No evidence of tax return provided.")
+
+                # --- Display Scores ---
+                show_detailed_scores(result, emi)
+
+                # ✅ Show N/A for Final Score if rejected early
+                if decision == "Reject" and final_score == 0:
+                    st.write("Final Score: N/A")
+                else:
+                    st.write(f"Final Score: {final_score:.1f}")
+
+                st.subheader(f"🏆 Decision: {decision_display}")
+                st.caption(f"Scorecard version {result.scorecard_version}")
+
+                # -------------------------------
+                # ⚠️ Bank Balance Rejection Message
+                # -------------------------------
+                if result.bal == 0:
+                    messages = []
+
+                    # Applicant condition
+                    if applicant_bank_balance is not None and applicant_bank_balance < 3 * emi:
+                        messages.append(
+                            f"Applicant bank balance Rs. {applicant_bank_balance:,.0f} "
+                            f"< required bank balance Rs. {3 * emi:,.0f} (3×EMI)"
+                        )
 
-                # Display messages
-                if messages:
-                    st.markdown("Bank Balance Criteria Not Met")
-                    for msg in messages:
-                        st.markdown(
-                            f'<div style="background-color: #fff3cd; border-left: 6px solid #ffeb3b; '
-                            f'padding: 10px; border-radius: 8px; margin-bottom: 8px;">'
-                            f'⚠️ <b>{msg}</b></div>',
-                            unsafe_allow_html=True
+                    # Guarantor condition
+                    if guarantor_bank_balance is not None and guarantor_bank_balance < 6 * emi:
+                        messages.append(
+                            f" Guarantor bank balance Rs. {guarantor_bank_balance:,.0f} "
+                            f"< required guarantor bank balance Rs. {6 * emi:,.0f} (6×EMI)"
                         )
 
-            # --- Financial Plan ---
-            if decision in ["Approved", "Review", "Reject"]:
-                st.markdown("### 💰 Applicant Financial Plan")
-                remaining_price = bike_price - down_payment
-                total_payment = emi * tenure
-                break_even = down_payment + total_payment
-                st.write(f"**Bike Price:** {bike_price:,.0f}")
-                st.write(f"**Down Payment:** {down_payment:,.0f}")
-                st.write(f"**Remaining Bike Price after Down Payment:** {remaining_price:,.0f}")
-                st.write(f"**Installment Tenure (Months):** {tenure}")
-                st.write(f"**Monthly EMI:** {emi:,.0f}")
-                st.write(f"**Total EMI over Tenure:** {total_payment:,.0f}")
-                st.write(f"**Total Paid Towards Bike (Down Payment + EMIs):** {break_even:,.0f}")
-
-                # --- Save Applicant Button ONLY if Approved ---
-                if st.button("💾 Save Applicant to Database"):
-                    try:
-                        applicant_data = {
-                            "first_name": first_name,
-                            "last_name": last_name,
-                            "cnic": cnic,
-                            "license_no": license_number,
-                            "phone_number": phone_number,
-                            "gender": gender,
-                            "guarantors": guarantors,
-                            "female_guarantor": female_guarantor,
-                            "electricity_bill": electricity_bill,
-                            "pdc_option": pdc_option,
-                            "education": education,
-                            "occupation": occupation,
-                            "designation": designation,
-                            "employer_name": employer_name,
-                            "employer_contact": employer_contact,
-                            "street_address": street_address,
-                            "area_address": area_address,
-                            "city": city,
-                            "state_province": state_province,
-                            "postal_code": postal_code,
-                            "country": country,
-                            "net_salary": net_salary,
-                            "applicant_bank_balance": applicant_bank_balance,
-                            "guarantor_bank_balance": guarantor_bank_balance,
-                            "employer_type": employer_type,
-                            "age": age,
-                            "residence": residence,
-                            "bike_type": bike_type,
-                            "bike_price": bike_price,
-                            "down_payment": down_payment,
-                            "tenure": tenure,
-                            "emi": emi,
-                            "outstanding": outstanding,
-                            "decision": decision,
-                            "applicant_type": st.session_state.get("applicant_type", "Employee"),
-
-                        }
-
-                        save_to_db(applicant_data)
-                        st.success("✅ Applicant saved successfully!")
-                    except Exception as e:
-                        st.error(f"❌ Failed to save applicant: {e}")
+                    # Display messages
+                    if messages:
+                        st.markdown("Bank Balance Criteria Not Met")
+                        for msg in messages:
+                            st.markdown(
+                                f'<div style="background-color: #fff3cd; border-left: 6px solid #ffeb3b; '
+                                f'padding: 10px; border-radius: 8px; margin-bottom: 8px;">'
+                                f'⚠️ <b>{msg}</b></div>',
+                                unsafe_allow_html=True
+                            )
+
+                # --- Financial Plan ---
+                if decision in ["Approved", "Review", "Reject"]:
+                    st.markdown("### 💰 Applicant Financial Plan")
+                    remaining_price = bike_price - down_payment
+                    total_payment = emi * tenure
+                    break_even = down_payment + total_payment
+                    st.write(f"**Bike Price:** {bike_price:,.0f}")
+                    st.write(f"**Down Payment:** {down_payment:,.0f}")
+                    st.write(f"**Remaining Bike Price after Down Payment:** {remaining_price:,.0f}")
+                    st.write(f"**Installment Tenure (Months):** {tenure}")
+                    st.write(f"**Monthly EMI:** {emi:,.0f}")
+                    st.write(f"**Total EMI over Tenure:** {total_payment:,.0f}")
+                    st.write(f"**Total Paid Towards Bike (Down Payment + EMIs):** {break_even:,.0f}")
+
+                    # --- Save Applicant Button ONLY if Approved ---
+                    if st.button("💾 Save Applicant to Database"):
+                        try:
+                            applicant_data = {
+                                "first_name": first_name,
+                                "last_name": last_name,
+                                "cnic": cnic,
+                                "license_no": license_number,
+                                "phone_number": phone_number,
+                                "gender": gender,
+                                "guarantors": guarantors,
+                                "female_guarantor": female_guarantor,
+                                "electricity_bill": electricity_bill,
+                                "pdc_option": pdc_option,
+                                "education": education,
+                                "occupation": occupation,
+                                "designation": designation,
+                                "employer_name": employer_name,
+                                "employer_contact": employer_contact,
+                                "street_address": street_address,
+                                "area_address": area_address,
+                                "city": city,
+                                "state_province": state_province,
+                                "postal_code": postal_code,
+                                "country": country,
+                                "net_salary": net_salary,
+                                "applicant_bank_balance": applicant_bank_balance,
+                                "guarantor_bank_balance": guarantor_bank_balance,
+                                "employer_type": employer_type,
+                                "age": age,
+                                "residence": residence,
+                                "bike_type": bike_type,
+                                "bike_price": bike_price,
+                                "down_payment": down_payment,
+                                "tenure": tenure,
+                                "emi": emi,
+                                "outstanding": outstanding,
+                                "salary_consistency": salary_consistency,
+                                "job_years": job_years,
+                                "dependents": dependents,
+                                "tax_return": tax_return,
+                                # Component scores and scorecard version, so the book can be rescored;
+                                # early rejections have no final score (shown as N/A above)
+                                **score_fields(result),
+                                "applicant_type": st.session_state.get("applicant_type", "Employee"),
+
+                            }
+
+                            # Journaled locally; the background writer commits it to the database
+                            enqueue_save(applicant_data)
+                            st.success("✅ Applicant saved! It will appear in the Applicants tab within moments.")
+                        except Exception as e:
+                            st.error(f"❌ Failed to save applicant: {e}")
+                    show_save_queue("results")
 
 
 
@@ -834,83 +562,241 @@ with tabs[2]:
 # -----------------------------
 # Page 4: Applicants
 # -----------------------------
-with tabs[3]:
-    st.subheader("📂 Applicants Database")
-
-    if st.button("🔄 Refresh Data"):
-        resequence_ids()
-        st.session_state.refresh = True
+if tabs[3].open:
+    with tabs[3], timed("ui.tab.applicants"):
+        st.subheader("📂 Applicants Database")
+
+        # 🔄 Read-only reload: drop cached results so this rerun queries the DB again.
+        # IDs are never rewritten here (see `python db.py resequence-ids` for offline compaction).
+        st.button("🔄 Refresh Data", on_click=invalidate_cache)
+        show_save_queue("applicants")
+
+        # 📤 Bulk import of dealer spreadsheets
+        with st.expander("📤 Bulk Import (CSV / XLSX)"):
+            uploaded = st.file_uploader("Upload applicants file", type=["csv", "xlsx"], key="bulk_import_file")
+            if uploaded is not None and st.button("⬆️ Import Applicants"):
+                try:
+                    report = bulk_import_applicants(read_applicant_file(uploaded))
+                    counts = report["status"].value_counts()
+                    st.success(
+                        f"✅ Imported {counts.get('inserted', 0):,} applicants — "
+                        f"{counts.get('duplicate', 0):,} duplicates, {counts.get('invalid', 0):,} invalid rows skipped."
+                    )
+                    skipped = report[report["status"] != "inserted"]
+                    if not skipped.empty:
+                        st.dataframe(skipped, use_container_width=True)
+                    st.download_button(
+                        label="📥 Download Import Report",
+                        data=report.to_csv(index=False).encode("utf-8"),
+                        file_name="import_report.csv",
+                        mime="text/csv"
+                    )
+                except Exception as e:
+                    st.error(f"❌ Bulk import failed: {e}")
+
+        # 🔍 Indexed lookup: exact CNIC / phone, or name prefix
+        search_term = st.text_input(
+            "🔍 Search Applicants", key="applicant_search",
+            placeholder="CNIC, 11-digit phone number or the start of a name"
+        ).strip()
+        if search_term:
+            try:
+                matches = search_applicants(search_term)
+                if matches.empty:
+                    st.info(f"ℹ️ No applicants match “{search_term}”.")
+                else:
+                    st.dataframe(matches, use_container_width=True, hide_index=True)
+                    if len(matches) == SEARCH_LIMIT:
+                        st.caption(f"Showing the first {SEARCH_LIMIT} matches — type more of the name to narrow it down.")
+            except Exception as e:
+                st.error(f"❌ Search failed: {e}")
+
+        # 🔎 Filters (applied in SQL, not in pandas)
+        with st.expander("🔎 Filters & Sorting", expanded=False):
+            f_col1, f_col2 = st.columns(2)
+            with f_col1:
+                f_decision = st.multiselect("Decision", ["Approved", "Review", "Reject", "Rejected"], key="f_decision")
+                f_bike_type = st.multiselect("Bike Type", ["EV-1", "EV-125"], key="f_bike_type")
+                f_applicant_type = st.multiselect("Applicant Type", ["Employee", "Businessman"], key="f_applicant_type")
+            with f_col2:
+                f_city = st.text_input("City", key="f_city").strip()
+                f_dates = st.date_input("Created Between", value=(), key="f_dates")
+                f_newest_first = st.toggle("Newest first", key="f_newest_first")
+
+        filters = {
+            "decision": f_decision,
+            "bike_type": f_bike_type,
+            "applicant_type": f_applicant_type,
+            "city": f_city,
+            "date_from": f_dates[0] if len(f_dates) > 0 else None,
+            "date_to": f_dates[1] if len(f_dates) > 1 else None,
+        }
+
+        # Keyset cursors: page_cursors[k] is the last id before page k (None for page 0).
+        # Any change to filters or sort order starts again from the first page.
+        view_key = (repr(filters), f_newest_first)
+        if st.session_state.get("page_view_key") != view_key:
+            st.session_state.page_view_key = view_key
+            st.session_state.page_cursors = [None]
+
+        def next_page(last_id):
+            st.session_state.page_cursors.append(last_id)
+
+        def prev_page():
+            st.session_state.page_cursors.pop()
 
-    def delete_applicant(applicant_id: int):
         try:
-            conn = get_db_connection()
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM data WHERE id = %s", (applicant_id,))
-            conn.commit()
-            cursor.close()
-            conn.close()
-            st.success(f"✅ Applicant with ID {applicant_id} deleted successfully!")
-        except Exception as e:
-            st.error(f"❌ Failed to delete applicant: {e}")
-
-    try:
-        df = fetch_all_applicants()
-        if not df.empty:
-            st.dataframe(df, use_container_width=True)
+            total = count_applicants(filters)
+            page_no = len(st.session_state.page_cursors)
+            df = fetch_applicants_page(
+                filters, after_id=st.session_state.page_cursors[-1], descending=f_newest_first
+            )
+            if df.empty and page_no > 1:
+                # Rows on this page were deleted since it was opened — start over
+                st.session_state.page_cursors = [None]
+                st.rerun()
+            if not df.empty:
+                # Gap-free numbering for display only; the stored ids never change
+                first_sr_no = (page_no - 1) * PAGE_SIZE + 1
+                df.insert(0, "Sr. No.", range(first_sr_no, first_sr_no + len(df)))
+                table = st.dataframe(
+                    df, use_container_width=True, hide_index=True,
+                    on_select="rerun", selection_mode="multi-row", key="applicants_table"
+                )
+                selected_ids = [int(i) for i in df["id"].iloc[table.selection.rows]]
+
+                total_pages = max(1, -(-total // PAGE_SIZE))
+                nav1, nav2, nav3 = st.columns([1, 2, 1])
+                with nav1:
+                    st.button("⬅️ Previous", on_click=prev_page, disabled=page_no == 1)
+                with nav2:
+                    st.caption(f"Page {page_no} of {total_pages} · {total:,} applicants")
+                with nav3:
+                    st.button(
+                        "Next ➡️", on_click=next_page, args=(int(df["id"].iloc[-1]),),
+                        disabled=page_no >= total_pages
+                    )
 
-            delete_id = st.number_input("Enter Applicant ID to Delete", min_value=1, step=1)
+                delete_id = st.number_input("Enter Applicant ID to Delete", min_value=1, step=1)
+
+                # 🔹 NEW: Two-step confirmation logic
+                if "confirm_delete" not in st.session_state:
+                    st.session_state.confirm_delete = None
+
+                if st.button("🗑️ Delete Applicant"):
+                    # Primary-key lookup, so any stored ID works, not just the current page's
+                    applicant = fetch_applicant(delete_id)
+                    if applicant:
+                        # Store selected ID + Name for confirmation
+                        st.session_state.confirm_delete = {"id": applicant["id"], "name": applicant["name"]}
+                    else:
+                        st.error("❌ Invalid ID. No applicant with this ID exists.")
+
+                # Show confirmation prompt if a delete is triggered
+                if st.session_state.confirm_delete:
+                    c_id = st.session_state.confirm_delete["id"]
+                    c_name = st.session_state.confirm_delete["name"]
+                    st.warning(f"⚠️ Are you sure you want to delete the data for ID: {c_id} and Name: {c_name}?")
+
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("✅ Yes, Delete"):
+                            try:
+                                delete_applicant(c_id)
+                                remember_deleted([c_id])
+                                st.success(f"✅ Applicant with ID {c_id} deleted successfully!")
+                            except Exception as e:
+                                st.error(f"❌ Failed to delete applicant: {e}")
+                            st.session_state.confirm_delete = None  # reset confirmation
+                    with col2:
+                        if st.button("❌ No, Cancel"):
+                            st.info("Deletion cancelled.")
+                            st.session_state.confirm_delete = None  # reset confirmation
+
+                # ☑️ Bulk actions on the rows ticked above: one SQL statement, one confirmation
+                if "confirm_bulk" not in st.session_state:
+                    st.session_state.confirm_bulk = None
+
+                if selected_ids:
+                    b_col1, b_col2 = st.columns([3, 1])
+                    bulk_action = b_col1.selectbox(
+                        f"Bulk action for {len(selected_ids)} selected applicant(s)",
+                        ["🗑️ Delete", *BULK_MOVES],
+                        key="bulk_action"
+                    )
+                    if b_col2.button("Preview", key="bulk_preview"):
+                        to_decision = BULK_MOVES.get(bulk_action)
+                        try:
+                            affected = count_selected(selected_ids, "Review" if to_decision else None)
+                            st.session_state.confirm_bulk = {
+                                "action": bulk_action, "to_decision": to_decision,
+                                "ids": selected_ids, "count": affected,
+                            }
+                        except Exception as e:
+                            st.error(f"❌ Failed to preview bulk action: {e}")
+
+                if st.session_state.confirm_bulk:
+                    bulk = st.session_state.confirm_bulk
+                    if bulk["to_decision"]:
+                        st.warning(
+                            f"⚠️ {bulk['action']}: {bulk['count']:,} of the {len(bulk['ids'])} selected applicant(s) "
+                            f"are in Review and will be set to {bulk['to_decision']}. Continue?"
+                        )
+                    else:
+                        st.warning(
+                            f"⚠️ Delete {bulk['count']:,} applicant(s)? "
+                            f"You can undo this for {DELETE_UNDO_SECONDS:.0f} seconds."
+                        )
 
-            # 🔹 NEW: Two-step confirmation logic
-            if "confirm_delete" not in st.session_state:
-                st.session_state.confirm_delete = None
+                    col1, col2 = st.columns(2)
+                    with col1:
+                        if st.button("✅ Confirm", key="bulk_confirm", disabled=bulk["count"] == 0):
+                            try:
+                                if bulk["to_decision"]:
+                                    changed = move_decisions(bulk["ids"], bulk["to_decision"])
+                                    st.success(f"✅ {changed:,} applicant(s) moved to {bulk['to_decision']}.")
+                                else:
+                                    changed = delete_applicants(bulk["ids"])
+                                    remember_deleted(bulk["ids"])
+                                    st.success(f"✅ {changed:,} applicant(s) deleted.")
+                            except Exception as e:
+                                st.error(f"❌ Bulk action failed: {e}")
+                            st.session_state.confirm_bulk = None
+                    with col2:
+                        if st.button("❌ Cancel", key="bulk_cancel"):
+                            st.info("Bulk action cancelled.")
+                            st.session_state.confirm_bulk = None
+
+                # 📥 Export is generated only when the button is clicked, streamed from the DB
+                export_format = st.selectbox("Export Format", list(EXPORT_FORMATS.keys()), key="export_format")
+                export_writer, export_file_name, export_mime = EXPORT_FORMATS[export_format]
+                st.download_button(
+                    label=f"📥 Download {export_format.split(' ')[0]}",
+                    data=lambda: export_writer(filters),
+                    file_name=export_file_name,
+                    mime=export_mime,
+                    on_click="ignore",
+                    help="Exports every applicant matching the current filters."
+                )
+            elif total == 0 and any(filters.values()):
+                st.info("ℹ️ No applicants match the selected filters.")
+            else:
+                st.info("ℹ️ No applicants found in the database yet.")
+        except Exception as e:
+            st.error(f"❌ Failed to load applicants: {e}")
 
-            if st.button("🗑️ Delete Applicant"):
-                if delete_id in df["id"].values:
-                    # Store selected ID + Name for confirmation
-                    applicant_name = df.loc[df["id"] == delete_id, "name"].values[0]
-                    st.session_state.confirm_delete = {"id": delete_id, "name": applicant_name}
-                else:
-                    st.error("❌ Invalid ID. Please enter a valid Applicant ID from the table.")
-
-            # Show confirmation prompt if a delete is triggered
-            if st.session_state.confirm_delete:
-                c_id = st.session_state.confirm_delete["id"]
-                c_name = st.session_state.confirm_delete["name"]
-                st.warning(f"⚠️ Are you sure you want to delete the data for ID: {c_id} and Name: {c_name}?")
-
-                col1, col2 = st.columns(2)
-                with col1:
-                    if st.button("✅ Yes, Delete"):
-                        delete_applicant(c_id)
-                        st.session_state.confirm_delete = None  # reset confirmation
-                with col2:
-                    if st.button("❌ No, Cancel"):
-                        st.info("Deletion cancelled.")
-                        st.session_state.confirm_delete = None  # reset confirmation
-
-            # Excel download remains the same
-            df = df.sort_values(by="id", ascending=True)
-            output = BytesIO()
-            with pd.ExcelWriter(output, engine="xlsxwriter") as writer:
-                df.to_excel(writer, index=False, sheet_name="Applicants")
-            excel_data = output.getvalue()
-
-            st.download_button(
-                label="📥 Download Excel",
-                data=excel_data,
-                file_name="applicants.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
-        else:
-            st.info("ℹ️ No applicants found in the database yet.")
-    except Exception as e:
-        st.error(f"❌ Failed to load applicants: {e}")
+        # ↩️ Deletes are soft until the purge job runs, so the latest one can be undone,
+        # also when it emptied the page or the table
+        show_undo_delete()
 
 
 # -----------------------------
 # Page 5: Agent (Direct Scoring)
 # -----------------------------
-with tabs[4]:
+# The agent form is self-contained, so its edits and button rerun only this fragment
+@st.fragment
+@instrumented("ui.fragment.agent")
+def agent_scoring():
     st.subheader("👾 Scoring Agent")
 
     # Applicant type & gender
@@ -940,26 +826,12 @@ with tabs[4]:
         agent_tenure_label = "Job Tenure (Years)"
         agent_tax_return = "Yes"  # implicitly yes for employees
 
-    # Reuse formatted input helper with separate keys
-    def agent_formatted_number_input(label, key, optional=False):
-        raw_key = f"{key}_raw"
-        raw_val = st.session_state.get(raw_key, "")
-
-        input_val = st.text_input(label, value=raw_val, key=raw_key)
-        clean_val = re.sub(r"[^\d]", "", input_val)
-        num = int(clean_val) if clean_val else (0 if not optional else None)
-
-        if clean_val:
-            st.caption(f"💰 **Formatted:** {num:,}")
-
-        return num
-
     # Core financial inputs
-    agent_net_salary = agent_formatted_number_input(agent_salary_label, key="agent_net_salary")
-    agent_applicant_bank_balance = agent_formatted_number_input(
+    agent_net_salary = formatted_number_input(agent_salary_label, key="agent_net_salary")
+    agent_applicant_bank_balance = formatted_number_input(
         "Applicant's Average 6M Bank Balance (PKR)", key="agent_applicant_bank_balance"
     )
-    agent_guarantor_bank_balance = agent_formatted_number_input(
+    agent_guarantor_bank_balance = formatted_number_input(
         "Guarantor's Average 6M Bank Balance (Optional, PKR)", key="agent_guarantor_bank_balance", optional=True
     )
 
@@ -985,60 +857,24 @@ with tabs[4]:
         if agent_net_salary <= 0 or agent_emi <= 0 or agent_tenure <= 0:
             st.error("❌ Please enter valid Net Salary/Profit, EMI, and Tenure values.")
         else:
-            # Individual scores using same logic as main engine
-            a_inc = income_score(agent_net_salary, agent_gender, agent_bike_type)
-            a_bal, a_bal_source = bank_balance_score_custom(
-                agent_applicant_bank_balance, agent_guarantor_bank_balance, agent_emi
-            )
-            a_sal = salary_consistency_score(agent_salary_consistency)
-            a_emp = employer_type_score(agent_employer_type)
-            a_job = job_tenure_score(agent_job_years)
-            a_ag = age_score(agent_age)
-            a_dep = dependents_score(agent_dependents)
-            a_res = residence_score(agent_residence)
-            a_dti, a_ratio = dti_score(agent_outstanding, agent_emi, agent_net_salary, agent_tenure)
-
-            a_final_score = 0
-            # Decision logic mirrors Results tab
-            if agent_applicant_type == "Businessman" and agent_tax_return == "No":
-                a_decision = "Rejected"
-                a_decision_display = "❌ Rejected (No Tax Return)"
-                st.error("❌ Rejected: No evidence of tax return provided.")
-            elif a_ag == -1:
-                a_decision = "Reject"
-                a_decision_display = "❌ Reject (Underage)"
-            elif a_bal == 0:
-                a_decision = "Reject"
-                a_decision_display = "❌ Reject (Insufficient Bank Balance)"
-            else:
-                a_final_score = (
-                    a_inc * 0.40 + a_bal * 0.30 + a_sal * 0.04 + a_emp * 0.04 +
-                    a_job * 0.04 + a_ag * 0.04 + a_dep * 0.04 + a_res * 0.05 +
-                    a_dti * 0.05
+            # Same memoized pipeline as the Results tab
+            with timed("scoring.score_applicant"):
+                a_result = score_applicant(
+                    agent_net_salary, agent_gender, agent_bike_type,
+                    agent_applicant_bank_balance, agent_guarantor_bank_balance,
+                    agent_emi, agent_tenure, agent_outstanding, agent_salary_consistency,
+                    agent_employer_type, agent_job_years, agent_age, agent_dependents,
+                    agent_residence, agent_applicant_type, agent_tax_return,
                 )
-                if a_final_score >= 75:
-                    a_decision = "Approved"
-                    a_decision_display = "✅ Approve"
-                elif a_final_score >= 60:
-                    a_decision = "Review"
-                    a_decision_display = "🟡 Review"
-                else:
-                    a_decision = "Reject"
-                    a_decision_display = "❌ Reject"
+            a_final_score = a_result.final_score
+            a_decision = a_result.decision
+            a_decision_display = decision_label(a_result)
+            if a_result.reject_reason == "No Tax Return":
+                st.error("❌ Rejected: No evidence of tax return provided.")
 
             # Show detailed scores
             st.markdown("### 🔹 Agent — Detailed Scores")
-            st.write(f"Income Score: {a_inc:.1f}")
-            st.write(f"Bank Balance Score ({a_bal_source}): {a_bal:.1f}")
-            st.write(f"Salary Consistency: {a_sal:.1f}")
-            st.write(f"Employer Type Score: {a_emp:.1f}")
-            st.write(f"Job Tenure Score: {a_job:.1f}")
-            st.write(f"Age Score: {a_ag:.1f}")
-            st.write(f"Dependents Score: {a_dep:.1f}")
-            st.write(f"Residence Score: {a_res:.1f}")
-            st.write(f"Debt-to-Income Ratio: {a_ratio:.2f}")
-            st.write(f"Debt-to-Income Score: {a_dti:.1f}")
-            st.write(f"EMI used for scoring: {agent_emi}")
+            show_detailed_scores(a_result, agent_emi, heading=False)
 
             if a_decision == "Reject" and a_final_score == 0:
                 st.write("Final Score: N/A")
@@ -1046,9 +882,10 @@ with tabs[4]:
                 st.write(f"Final Score: {a_final_score:.1f}")
 
             st.subheader(f"🏆 Agent Decision: {a_decision_display}")
+            st.caption(f"Scorecard version {a_result.scorecard_version}")
 
             # Bank balance criteria explanation
-            if a_bal == 0:
+            if a_result.bal == 0:
                 a_messages = []
                 if agent_applicant_bank_balance is not None and agent_applicant_bank_balance < 3 * agent_emi:
                     a_messages.append(
@@ -1069,3 +906,234 @@ with tabs[4]:
                             f'⚠️ <b>{msg}</b></div>',
                             unsafe_allow_html=True
                         )
+
+
+if tabs[4].open:
+    with tabs[4], timed("ui.tab.agent"):
+        agent_scoring()
+
+
+# -----------------------------
+# Page 6: Portfolio
+# -----------------------------
+PORTFOLIO_GROUP_LABELS = {
+    "City": "city", "Bike Type": "bike_type", "Applicant Type": "applicant_type", "Decision": "decision",
+}
+
+if tabs[5].open:
+    with tabs[5], timed("ui.tab.portfolio"):
+        st.subheader("📈 Portfolio")
+
+        p_col1, p_col2, p_col3 = st.columns(3)
+        group_label = p_col1.selectbox("Group by", list(PORTFOLIO_GROUP_LABELS), key="portfolio_group")
+        p_from = p_col2.date_input("Saved from", value=None, key="portfolio_from")
+        p_to = p_col3.date_input("Saved to", value=None, key="portfolio_to")
+
+        try:
+            group_by = PORTFOLIO_GROUP_LABELS[group_label]
+            portfolio = portfolio_aggregates(group_by, {"date_from": p_from, "date_to": p_to})
+        except Exception as e:
+            st.error(f"❌ Could not load portfolio: {e}")
+            portfolio = None
+
+        if portfolio is not None and portfolio.empty:
+            st.info("No applicants saved yet.")
+        elif portfolio is not None:
+            total = portfolio["applicants"].sum()
+            scored = portfolio["scored"].sum()
+            k1, k2, k3, k4 = st.columns(4)
+            k1.metric("Applicants", f"{total:,.0f}")
+            k2.metric("Approval Rate", f"{portfolio['approved'].sum() / total:.1%}")
+            k3.metric(
+                "Avg Final Score",
+                f"{(portfolio['avg_final_score'] * portfolio['scored']).sum() / scored:.1f}" if scored else "N/A",
+            )
+            k4.metric("Exposure", f"Rs. {portfolio['exposure'].sum():,.0f}")
+            st.caption(f"Monthly EMI total: Rs. {portfolio['emi_total'].sum():,.0f} · Exposure = bike price − down payment")
+
+            st.dataframe(
+                portfolio.drop(columns=["scored"]),
+                hide_index=True,
+                use_container_width=True,
+                column_config={
+                    group_by: st.column_config.TextColumn(group_label),
+                    "applicants": st.column_config.NumberColumn("Applicants", format="%d"),
+                    "approved": st.column_config.NumberColumn("Approved", format="%d"),
+                    "approval_rate": st.column_config.ProgressColumn(
+                        "Approval Rate", format="percent", min_value=0, max_value=1
+                    ),
+                    "avg_final_score": st.column_config.NumberColumn("Avg Final Score", format="%.1f"),
+                    "exposure": st.column_config.NumberColumn("Exposure (Rs.)", format="localized"),
+                    "emi_total": st.column_config.NumberColumn("EMI Total (Rs.)", format="localized"),
+                },
+            )
+            st.bar_chart(portfolio, x=group_by, y="exposure", horizontal=True)
+
+        # 💵 Month-by-month expected collections across every approved loan
+        st.markdown("### 💵 Expected Collections")
+        try:
+            loans = fetch_loans()
+            if not len(loans):
+                st.info("No approved loans yet.")
+            else:
+                collections = collections_by_month(loans)
+                ahead = collections[collections["month"] >= time.strftime("%Y-%m-01")]
+                c1, c2, c3 = st.columns(3)
+                c1.metric("Approved Loans", f"{len(loans):,}")
+                c2.metric("Due Next 12 Months", f"Rs. {ahead['total'].head(12).sum():,.0f}")
+                c3.metric("Still to Collect", f"Rs. {ahead['total'].sum():,.0f}")
+                st.bar_chart(collections, x="month", y=["down_payments", "emis"])
+                with st.expander("Monthly schedule"):
+                    st.dataframe(
+                        collections, hide_index=True, use_container_width=True,
+                        column_config={
+                            "month": st.column_config.DateColumn("Month", format="MMM YYYY"),
+                            "down_payments": st.column_config.NumberColumn("Down Payments (Rs.)", format="localized"),
+                            "emis": st.column_config.NumberColumn("EMIs (Rs.)", format="localized"),
+                            "total": st.column_config.NumberColumn("Total (Rs.)", format="localized"),
+                            "active_loans": st.column_config.NumberColumn("Loans Paying", format="%d"),
+                        },
+                    )
+                st.download_button(
+                    label="📥 Download Per-Loan Schedule (.csv)",
+                    data=lambda: export_schedule_csv(loans),
+                    file_name="loan_schedule.csv",
+                    mime="text/csv",
+                    on_click="ignore",
+                    help="One row per instalment of every approved loan."
+                )
+        except Exception as e:
+            st.error(f"❌ Could not project collections: {e}")
+
+
+# -----------------------------
+# Page 7: What-if
+# -----------------------------
+WHATIF_PLANS = {f"{bike} · {name}": (bike, name) for bike, plans in FINANCING_PLANS.items() for name in plans}
+WHATIF_COLORS = {"Reject": "#e45756", "Review": "#f2c94c", "Approved": "#54a24b"}
+
+if tabs[6].open:
+    with tabs[6], timed("ui.tab.whatif"):
+        st.subheader("🧪 What-if")
+        st.caption("Scores every combination below with the live scorecard; inputs not swept use the fixed profile.")
+
+        w_col1, w_col2 = st.columns(2)
+        salary_range = w_col1.slider("Net Salary (PKR)", 0, 500_000, (20_000, 250_000), step=5_000, key="whatif_salary")
+        salary_steps = w_col1.number_input("Salary steps", 2, 5_000, 500, key="whatif_salary_steps")
+        balance_range = w_col2.slider("Bank Balance (PKR)", 0, 1_000_000, (0, 300_000), step=10_000, key="whatif_balance")
+        balance_steps = w_col2.number_input("Balance steps", 2, 5_000, 250, key="whatif_balance_steps")
+
+        plan_labels = st.multiselect("Financing Plans", list(WHATIF_PLANS), default=list(WHATIF_PLANS), key="whatif_plans")
+        f_col1, f_col2, f_col3 = st.columns(3)
+        genders = f_col1.multiselect("Gender", ["M", "F"], default=["M", "F"], key="whatif_genders")
+        residences = f_col2.multiselect(
+            "Residence", list(scoring.SCORECARD.residence_points), default=["Owned", "Rented"], key="whatif_residences"
+        )
+        employer_types = f_col3.multiselect(
+            "Employer Type", list(scoring.SCORECARD.employer_points), default=[PROFILE_DEFAULTS["employer_type"]],
+            key="whatif_employers",
+        )
+
+        with st.expander("Fixed applicant profile"):
+            fx_col1, fx_col2, fx_col3 = st.columns(3)
+            profile = {
+                "salary_consistency": fx_col1.number_input(
+                    "Months with Salary Credit (0–6)", 0, 6, PROFILE_DEFAULTS["salary_consistency"], key="whatif_months"
+                ),
+                "job_years": fx_col1.number_input("Job Tenure (Years)", 0, 60, PROFILE_DEFAULTS["job_years"], key="whatif_job"),
+                "age": fx_col2.number_input("Age", 18, 70, PROFILE_DEFAULTS["age"], key="whatif_age"),
+                "dependents": fx_col2.number_input(
+                    "Number of Dependents", 0, 20, PROFILE_DEFAULTS["dependents"], key="whatif_dependents"
+                ),
+                "outstanding": fx_col3.number_input(
+                    "Outstanding Obligation", 0, None, PROFILE_DEFAULTS["outstanding"], step=1000, key="whatif_outstanding"
+                ),
+                "guarantor_bank_balance": fx_col3.number_input(
+                    "Guarantor's Bank Balance (Optional)", 0, None, None, step=10_000, key="whatif_guarantor"
+                ),
+            }
+
+        grid_points = (int(salary_steps) * int(balance_steps) * len(plan_labels)
+                       * len(genders) * len(residences) * len(employer_types))
+        if not (plan_labels and genders and residences and employer_types):
+            st.info("Pick at least one plan, gender, residence and employer type.")
+        elif grid_points > MAX_GRID_POINTS:
+            st.error(f"❌ The grid has {grid_points:,} points; the limit is {MAX_GRID_POINTS:,}. "
+                     "Use fewer steps or values.")
+        else:
+            import altair as alt
+            import numpy as np
+
+            sweep = sensitivity_sweep(
+                salaries=np.linspace(*salary_range, int(salary_steps)),
+                balances=np.linspace(*balance_range, int(balance_steps)),
+                plans=[WHATIF_PLANS[label] for label in plan_labels],
+                genders=genders,
+                residences=residences,
+                employer_types=employer_types,
+                profile=profile,
+            )
+            by_gender = sweep.approval_rate("gender")
+            k1, k2, k3 = st.columns(3)
+            k1.metric("Grid Points", f"{sweep.size:,}")
+            k2.metric("Approved", f"{(sweep.decision == 2).mean():.1%}")
+            if {"M", "F"} <= set(genders):
+                k3.metric("Female Uplift", f"{(by_gender['F'] - by_gender['M']) * 100:+.1f} pp",
+                          help=f"Approval share for F minus M (income × {scoring.SCORECARD.female_multiplier}).")
+
+            # 🗺️ One balance × salary slice; the other axes are fixed by these selectors
+            st.markdown("### 🗺️ Decision Map")
+            slice_axes = {
+                "plan": ("Plan", plan_labels), "gender": ("Gender", genders),
+                "residence": ("Residence", residences), "employer_type": ("Employer Type", employer_types),
+            }
+            s_cols = st.columns(len(slice_axes))
+            selection = {}
+            for s_col, (axis, (label, options)) in zip(s_cols, slice_axes.items()):
+                choice = s_col.selectbox(label, options, key=f"whatif_slice_{axis}")
+                selection[axis] = WHATIF_PLANS[choice] if axis == "plan" else choice
+
+            cells = sweep.decision_frame(**selection)
+            heatmap = alt.Chart(cells).mark_rect().encode(
+                x=alt.X("salary:O", title="Net Salary (PKR)", axis=alt.Axis(format=",.0f", labelOverlap=True)),
+                y=alt.Y("balance:O", title="Bank Balance (PKR)", sort="descending",
+                        axis=alt.Axis(format=",.0f", labelOverlap=True)),
+                color=alt.Color("decision:N", scale=alt.Scale(
+                    domain=list(WHATIF_COLORS), range=list(WHATIF_COLORS.values())
+                ), title="Decision"),
+                tooltip=[
+                    alt.Tooltip("salary:Q", format=",.0f"), alt.Tooltip("balance:Q", format=",.0f"),
+                    alt.Tooltip("final_score:Q", format=".1f"), "decision:N",
+                ],
+            )
+            st.altair_chart(heatmap, use_container_width=True)
+            if len(cells) < int(salary_steps) * int(balance_steps):
+                st.caption("Dense grids are sampled evenly for display; the figures above use every point.")
+
+            boundary = sweep.min_approved_salary(**selection).reset_index()
+            st.markdown("**Lowest approved salary by bank balance**")
+            st.line_chart(boundary, x="balance", y="min_approved_salary")
+
+            multi = [axis for axis in slice_axes if len(sweep.axes[axis]) > 1]
+            if multi:
+                st.markdown("### ⚖️ Approval Share by Factor")
+                for r_col, axis in zip(st.columns(len(multi)), multi):
+                    rates = sweep.approval_rate(axis).reset_index()
+                    r_col.dataframe(
+                        rates, hide_index=True, use_container_width=True,
+                        column_config={
+                            axis: st.column_config.TextColumn(slice_axes[axis][0]),
+                            "approval_rate": st.column_config.ProgressColumn(
+                                "Approved", format="percent", min_value=0, max_value=1
+                            ),
+                        },
+                    )
+
+
+# -----------------------------
+# Metrics
+# -----------------------------
+observe("ui.rerun", time.perf_counter() - rerun_started)
+write_metrics_file()
+if METRICS_ADMIN_TOKEN and st.query_params.get("admin") == METRICS_ADMIN_TOKEN:
+    show_metrics_panel()
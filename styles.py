@@ -0,0 +1,121 @@
+"""
+Page styling, built once per process.
+
+The app script re-runs on every interaction, but imported modules don't, so
+the CSS is minified here once and the script only sends the finished string.
+"""
+import re
+
+_LANDING = """
+[data-testid="stAppViewContainer"] {
+    background: linear-gradient(135deg, #001F3F 0%, #0074D9 50%, #7FDBFF 100%);
+    color: white;
+    padding-top: 6rem;
+}
+[data-testid="stHeader"] {background: rgba(0,0,0,0);}
+.title {
+    font-size: 2.8rem;
+    font-weight: 800;
+    margin-bottom: 1rem;
+    text-align: center;
+    background: linear-gradient(to right, #7FDBFF, #39CCCC, #01FF70);
+    -webkit-background-clip: text;
+    -webkit-text-fill-color: transparent;
+}
+.subtitle {
+    font-size: 1.1rem;
+    color: #E0E0E0;
+    text-align: center;
+    margin-bottom: 2.5rem;
+}
+.divider {
+    border: none;
+    height: 1px;
+    background-color: rgba(255, 255, 255, 0.3);
+    margin: 2rem 0;
+}
+/* --- Custom blue button --- */
+div.stButton > button:first-child {
+    background-color: #0074D9;
+    color: white;
+    border: none;
+    padding: 0.75rem 1.5rem;
+    border-radius: 10px;
+    font-size: 1.1rem;
+    font-weight: 600;
+    transition: 0.3s ease-in-out;
+}
+div.stButton > button:first-child:hover {
+    background-color: #005fa3;
+    transform: translateY(-2px);
+    box-shadow: 0 4px 10px rgba(0,0,0,0.3);
+}
+"""
+
+_APP = """
+/* 🔵 Global Blue Gradient Background */
+[data-testid="stAppViewContainer"] {
+    background: linear-gradient(to bottom right, #004aad, #5de0e6);
+    background-attachment: fixed;
+}
+
+/* 📄 Solid White Form Container */
+.block-container {
+    background-color: #ffffff;  /* Fully opaque white */
+    padding: 2rem 3rem;
+    border-radius: 20px;
+    box-shadow: 0px 3px 10px rgba(0,0,0,0.2);
+    margin-top: 2rem;
+    margin-bottom: 2rem;
+}
+
+/* 🌈 Headings on Blue Background (Landing Page Titles) */
+h1, h2, h3, h4 {
+    color: #ffffff;
+    font-weight: 700;
+}
+
+/* 🧾 Form and Body Text (on white areas) */
+.stTextInput label,
+.stSelectbox label,
+.stNumberInput label,
+.stRadio label,
+.stCheckbox label,
+p, span, div, label {
+    color: #002b80 !important;  /* Dark blue text for readability */
+}
+
+/* 💾 Primary Buttons */
+button[kind="primary"] {
+    background-color: #004aad !important;
+    color: white !important;
+    font-weight: 600 !important;
+    border-radius: 10px !important;
+    border: none !important;
+}
+
+button[kind="primary"]:hover {
+    background-color: #0059d6 !important;
+    color: white !important;
+}
+
+/* 🎯 Input Styling */
+.stTextInput > div > div > input,
+.stNumberInput input,
+.stSelectbox select {
+    border-radius: 10px !important;
+    border: 1px solid #004aad !important;
+}
+"""
+
+
+def _style_tag(css: str) -> str:
+    """ Strip comments and collapse whitespace; the browser doesn't need either """
+    css = re.sub(r"/\*.*?\*/", "", css, flags=re.S)
+    css = re.sub(r"\s+", " ", css)
+    css = re.sub(r"\s*([{};:,>])\s*", r"\1", css)
+    return f"<style>{css.strip()}</style>"
+
+
+LANDING_CSS = _style_tag(_LANDING)
+APP_CSS = _style_tag(_APP)
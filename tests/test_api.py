@@ -0,0 +1,107 @@
+import pytest
+from starlette.testclient import TestClient
+
+import api
+import db
+import storage
+
+APPLICANT = {
+    "net_salary": 80000, "gender": "M", "bike_type": "EV-125",
+    "applicant_bank_balance": 100000, "guarantor_bank_balance": None,
+    "emi": 8000, "tenure": 36, "outstanding": 0, "salary_consistency": 6,
+    "employer_type": "Private Limited", "job_years": 3, "age": 30, "dependents": 0,
+    "residence": "Owned", "applicant_type": "Employee", "tax_return": "Yes",
+}
+
+
+@pytest.fixture(scope="module")
+def client():
+    with TestClient(api.app) as client:
+        yield client
+
+
+def test_score_batch_mixes_early_rejects_and_scored_rows(client):
+    applicants = [
+        APPLICANT,
+        {**APPLICANT, "age": 16},
+        {**APPLICANT, "applicant_bank_balance": 0},
+        {**APPLICANT, "applicant_type": "Businessman", "tax_return": "No"},
+    ]
+    response = client.post("/score/batch", json={"applicants": applicants})
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [r["reject_reason"] for r in results] == [
+        None, "Underage", "Insufficient Bank Balance", "No Tax Return",
+    ]
+    assert results[0]["decision"] in ("Approved", "Review", "Reject")
+    assert [r["decision"] for r in results[1:]] == ["Reject", "Reject", "Rejected"]
+
+
+def test_score_batch_matches_single_score(client):
+    single = client.post("/score", json=APPLICANT).json()
+    batch = client.post("/score/batch", json={"applicants": [APPLICANT]}).json()["results"][0]
+
+    assert batch["decision"] == single["decision"]
+    assert batch["final_score"] == pytest.approx(single["final_score"])
+
+
+@pytest.mark.parametrize("field, value", [
+    ("gender", ["M"]),
+    ("employer_type", {"name": "Govt"}),
+    ("residence", "Castle"),
+    ("bike_type", 125),
+    ("applicant_type", "Student"),
+    ("tax_return", True),
+])
+def test_invalid_text_fields_are_rejected(client, field, value):
+    bad = {**APPLICANT, field: value}
+
+    assert client.post("/score", json=bad).status_code == 422
+    assert client.post("/score/batch", json={"applicants": [APPLICANT, bad]}).status_code == 422
+
+
+PERSIST_PAYLOAD = {
+    **APPLICANT,
+    "first_name": "Ayesha", "last_name": "Khan", "cnic": "35202-1234567-1", "license_no": "LHR-1",
+    "phone_number": "03001234567", "guarantors": "Yes", "electricity_bill": "Yes", "pdc_option": "Yes",
+    "street_address": "12 Main Road", "area_address": "Gulberg", "city": "Lahore",
+    "state_province": "Punjab", "country": "Pakistan", "bike_price": 250000, "down_payment": 50000,
+}
+
+
+def test_persist_stores_once_per_cnic(client):
+    created = client.post("/applicants", json=PERSIST_PAYLOAD)
+    assert created.status_code == 201
+    assert created.json()["id"] > 0
+    assert created.json()["decision"] == client.post("/score", json=APPLICANT).json()["decision"]
+
+    # Same person, undashed CNIC
+    again = client.post("/applicants", json={**PERSIST_PAYLOAD, "cnic": "3520212345671"})
+    assert again.status_code == 409
+    assert again.json()["error"] == db.DUPLICATE_CNIC_MESSAGE
+
+
+def test_persist_prechecks_cnic_while_unique_index_is_missing(client, monkeypatch):
+    payload = {**PERSIST_PAYLOAD, "cnic": "35202-7654321-1"}
+    assert client.post("/applicants", json=payload).status_code == 201
+
+    with db.db_connection() as conn:
+        conn.cursor().execute("DROP INDEX uq_data_live_cnic")
+        conn.commit()
+    try:
+        monkeypatch.setattr(db, "_unique_cnic_enforced", False)
+        assert client.post("/applicants", json=payload).status_code == 409
+    finally:
+        with db.db_connection() as conn:
+            conn.cursor().execute(db.backend().live_unique_index_sql("uq_data_live_cnic", "cnic"))
+            conn.commit()
+
+
+def test_mysql_duplicate_key_covers_the_async_driver():
+    pymysql = pytest.importorskip("pymysql")
+    pytest.importorskip("mysql.connector")
+    mysql = storage.MySQLBackend("localhost", "user", "password", "ev_installment_project")
+
+    assert mysql.is_duplicate_key(pymysql.err.IntegrityError(1062, "Duplicate entry"))
+    assert not mysql.is_duplicate_key(pymysql.err.IntegrityError(1048, "Column cannot be null"))
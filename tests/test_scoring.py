@@ -0,0 +1,196 @@
+"""
+The scorecard engine against the rules it replaced.
+
+The legacy_* helpers are the hard-coded if/elif rules scoring.py had before
+scorecard.json; every bracket boundary is checked on both sides, through the
+scalar (bisect) and the vectorized (searchsorted) lookups.
+"""
+import numpy as np
+import pytest
+
+import scoring
+from scoring import SCORECARD
+
+
+def legacy_income(net_salary, gender, bike_type=None):
+    if bike_type == "EV-1":
+        limits, points = (35000, 50000, 70000, 90000, 110000, 130000), (0, 30, 40, 50, 60, 80)
+    else:
+        limits, points = (50000, 70000, 90000, 100000, 120000, 150000), (0, 30, 40, 50, 60, 80)
+    base = next((p for limit, p in zip(limits, points) if net_salary < limit), 100)
+    if gender == "F":
+        base *= 1.1
+    return min(base, 100)
+
+
+def legacy_job_tenure(years):
+    return next((p for limit, p in ((10, 100), (5, 70), (3, 50), (1, 20)) if years >= limit), 0)
+
+
+def legacy_age(age):
+    if age < 18:
+        return -1
+    return next((p for limit, p in ((25, 80), (30, 100), (40, 60)) if age <= limit), 30)
+
+
+def legacy_dependents(dep):
+    if dep == 0:
+        return 100
+    return next((p for limit, p in ((2, 80), (4, 60)) if dep <= limit), 40)
+
+
+def legacy_dti(ratio):
+    return next((p for limit, p in ((0.1, 100), (0.2, 80), (0.3, 60), (0.5, 40)) if ratio <= limit), 20)
+
+
+def around(*breaks, eps=1e-9):
+    """ Each break, and values just below and above it """
+    return sorted({v for b in breaks for v in (b - eps, b, b + eps)} | {0})
+
+
+# -----------------------------
+# Bracket boundaries
+# -----------------------------
+@pytest.mark.parametrize("bike_type", ["EV-1", "EV-125", None])
+@pytest.mark.parametrize("gender", ["M", "F"])
+def test_income_brackets_are_strict_upper_bounds(bike_type, gender):
+    table = SCORECARD.income_table(bike_type)
+    salaries = around(*table.breaks, eps=0.5)
+    for salary in salaries:
+        assert scoring.income_score(salary, gender, bike_type) == pytest.approx(
+            legacy_income(salary, gender, bike_type)), salary
+    assert table.side == "right"
+    assert table.lookup_array(np.array(salaries)).tolist() == [table.lookup(s) for s in salaries]
+
+
+def test_female_multiplier_and_cap():
+    assert scoring.income_score(95_000, "F", "EV-125") == pytest.approx(50 * 1.1)
+    assert scoring.income_score(130_000, "F", "EV-125") == pytest.approx(80 * 1.1)
+    assert scoring.income_score(150_000, "F", "EV-125") == 100      # 100 x 1.1 capped
+    assert scoring.income_score(40_000, "F", "EV-125") == 0
+    assert scoring.income_score(95_000, "M", "EV-125") == 50
+
+
+@pytest.mark.parametrize("years", around(1, 3, 5, 10))
+def test_job_tenure_brackets(years):
+    assert scoring.job_tenure_score(years) == legacy_job_tenure(years)
+
+
+@pytest.mark.parametrize("age", around(18, 25, 30, 40))
+def test_age_brackets_include_the_upper_bound(age):
+    # side="left": an age equal to a break stays in the lower bracket (<= rules)
+    assert scoring.age_score(age) == legacy_age(age)
+
+
+def test_age_boundaries_explicitly():
+    assert SCORECARD.age.side == "left"
+    assert [scoring.age_score(a) for a in (17, 18, 25, 26, 30, 31, 40, 41)] == [-1, 80, 80, 100, 100, 60, 60, 30]
+
+
+@pytest.mark.parametrize("dependents", [0, 1, 2, 3, 4, 5, 9])
+def test_dependents_brackets(dependents):
+    assert scoring.dependents_score(dependents) == legacy_dependents(dependents)
+
+
+@pytest.mark.parametrize("ratio", around(0.1, 0.2, 0.3, 0.5))
+def test_dti_brackets_include_the_upper_bound(ratio):
+    assert SCORECARD.dti.side == "left"
+    assert SCORECARD.dti.lookup(ratio) == legacy_dti(ratio)
+    assert SCORECARD.dti.lookup_array(np.array([ratio]))[0] == legacy_dti(ratio)
+
+
+def test_dti_ratio_exactly_on_a_break():
+    # (0 / 36 + 10_000) / 50_000 == 0.2 exactly: stays in the 80-point bracket
+    assert scoring.dti_score(0, 10_000, 50_000, 36) == (80, 0.2)
+    assert scoring.dti_score(0, 10_000, 0, 36) == (0, 0)
+
+
+def test_bank_balance_multiples():
+    assert scoring.bank_balance_score_custom(30_000, None, 10_000) == (100, "Applicant")
+    assert scoring.bank_balance_score_custom(29_999, None, 10_000) == (0, "None")
+    assert scoring.bank_balance_score_custom(0, 60_000, 10_000) == (100, "Guarantor")
+    assert scoring.bank_balance_score_custom(30_000, 60_000, 10_000) == (100, "Applicant (Priority)")
+
+
+def test_thresholds():
+    assert [scoring.decide(s) for s in (75, 74.99, 60, 59.99)] == ["Approved", "Review", "Review", "Reject"]
+
+
+# -----------------------------
+# Early rejects
+# -----------------------------
+APPLICANT = dict(
+    net_salary=120_000, gender="M", bike_type="EV-125", applicant_bank_balance=100_000,
+    guarantor_bank_balance=None, emi=10_000, tenure=36, outstanding=0, salary_consistency=6,
+    employer_type="Govt", job_years=5, age=30, dependents=0, residence="Owned",
+    applicant_type="Employee", tax_return="Yes",
+)
+
+
+@pytest.mark.parametrize("changes, decision, reason", [
+    ({}, "Approved", None),
+    ({"applicant_type": "Businessman", "tax_return": "No"}, "Rejected", "No Tax Return"),
+    ({"applicant_type": "Businessman", "tax_return": "No", "age": 16}, "Rejected", "No Tax Return"),
+    ({"age": 17}, "Reject", "Underage"),
+    ({"age": 17, "applicant_bank_balance": 0}, "Reject", "Underage"),
+    ({"applicant_bank_balance": 29_999}, "Reject", "Insufficient Bank Balance"),
+    ({"applicant_type": "Businessman", "tax_return": "Yes"}, "Approved", None),
+])
+def test_early_reject_codes_and_precedence(changes, decision, reason):
+    result = scoring.score_applicant(**{**APPLICANT, **changes})
+
+    assert (result.decision, result.reject_reason) == (decision, reason)
+    if reason:
+        assert result.final_score == 0
+
+
+# -----------------------------
+# score_batch parity
+# -----------------------------
+def applicants_frame(n=2000, seed=7):
+    """ Random applicants with values pinned on bracket boundaries mixed in """
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    card = SCORECARD
+    salary_breaks = sorted({b for table in card.income.values() for b in table.breaks})
+    emi = rng.choice([5_000, 10_000, 12_500], n).astype(float)
+    return pd.DataFrame({
+        "net_salary": rng.choice([*salary_breaks, 0, *rng.integers(20_000, 200_000, 20)], n).astype(float),
+        "gender": rng.choice(["M", "F"], n),
+        "bike_type": rng.choice(["EV-1", "EV-125", None], n),
+        "applicant_bank_balance": emi * rng.choice([0, 2.9, 3, 4], n),
+        "guarantor_bank_balance": np.where(rng.random(n) < 0.3, np.nan, emi * rng.choice([5, 6, 7], n)),
+        "emi": emi,
+        "tenure": rng.choice([0, 12, 24, 36], n).astype(float),
+        "outstanding": rng.choice([0, 12_000, 60_000], n).astype(float),
+        "salary_consistency": rng.choice([0, 3, 6, 9], n).astype(float),
+        "employer_type": rng.choice([*card.employer_points, "Unknown"], n),
+        "job_years": rng.choice([*card.job_tenure.breaks, 0, 0.5, 12], n).astype(float),
+        "age": rng.choice([17, *card.age.breaks, 26, 45], n).astype(float),
+        "dependents": rng.choice([0, *card.dependents.breaks, 3, 7], n).astype(float),
+        "residence": rng.choice([*card.residence_points, "Unknown"], n),
+        "applicant_type": rng.choice(["Employee", "Businessman"], n),
+        "tax_return": rng.choice(["Yes", "No"], n),
+    })
+
+
+def test_score_batch_matches_score_applicant_row_for_row():
+    df = applicants_frame()
+    batch = scoring.score_batch(df)
+
+    assert batch.index.equals(df.index)
+    for record, (_, scored) in zip(df.to_dict("records"), batch.iterrows()):
+        if np.isnan(record["guarantor_bank_balance"]):
+            record["guarantor_bank_balance"] = None
+        expected = scoring.score_applicant(**record)
+
+        for field in (*scoring.COMPONENTS, "ratio", "final_score"):
+            assert scored[field] == pytest.approx(getattr(expected, field)), (field, record)
+        assert (scored["bal_source"], scored["decision"], scored["reject_reason"]) == (
+            expected.bal_source, expected.decision, expected.reject_reason), record
+
+
+def test_score_batch_covers_every_outcome():
+    outcomes = set(scoring.score_batch(applicants_frame())["reject_reason"].fillna("scored"))
+    assert outcomes == {"scored", "No Tax Return", "Underage", "Insufficient Bank Balance"}